@@ -5,6 +5,7 @@ from sqlalchemy import pool
 
 from alembic import context
 
+from sql_app.database import SQLALCHEMY_DATABASE_URL
 from sql_app.models import Base
 
 # this is the Alembic Config object, which provides
@@ -16,12 +17,22 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# The database URL comes from the environment (EVENT_PRESENTER_DATABASE_URL), like for the API and the importer
+config.set_main_option("sqlalchemy.url", SQLALCHEMY_DATABASE_URL)
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    """Leave the FTS5 table search_index of revision 0003, and the shadow tables SQLite keeps for it, out of
+    autogenerate and `alembic check`: they are created by SQL and have no model."""
+    return not (type_ == "table" and reflected and name.startswith("search_index"))
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -47,6 +58,7 @@ def run_migrations_offline() -> None:
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
         compare_type=True,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -68,7 +80,8 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata, compare_type=True
+            connection=connection, target_metadata=target_metadata, compare_type=True,
+            include_object=include_object
         )
 
         with context.begin_transaction():
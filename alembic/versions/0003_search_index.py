@@ -0,0 +1,53 @@
+"""search index
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 12:41:08.118305
+
+Full-text index over person names and organisation names for prefix search. On SQLite it is an FTS5 table kept
+in sync with persons and organisations by triggers, so every write of the importer updates it. Rowids encode the
+source row: 2 * id for persons, 2 * id + 1 for organisations.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+PERSON_NAME = "coalesce(new.given_name, '') || ' ' || coalesce(new.family_name, '')"
+ORGANISATION_NAME = "new.name || ' ' || coalesce(new.short_name, '')"
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.execute("CREATE VIRTUAL TABLE search_index USING fts5("
+               "name, tokenize = 'unicode61 remove_diacritics 2', prefix = '1 2 3')")
+    op.execute(f"CREATE TRIGGER persons_search_insert AFTER INSERT ON persons BEGIN "
+               f"INSERT INTO search_index (rowid, name) VALUES (2 * new.id, {PERSON_NAME}); END")
+    op.execute(f"CREATE TRIGGER persons_search_update AFTER UPDATE ON persons BEGIN "
+               f"UPDATE search_index SET name = {PERSON_NAME} WHERE rowid = 2 * new.id; END")
+    op.execute("CREATE TRIGGER persons_search_delete AFTER DELETE ON persons BEGIN "
+               "DELETE FROM search_index WHERE rowid = 2 * old.id; END")
+    op.execute(f"CREATE TRIGGER organisations_search_insert AFTER INSERT ON organisations BEGIN "
+               f"INSERT INTO search_index (rowid, name) VALUES (2 * new.id + 1, {ORGANISATION_NAME}); END")
+    op.execute(f"CREATE TRIGGER organisations_search_update AFTER UPDATE ON organisations BEGIN "
+               f"UPDATE search_index SET name = {ORGANISATION_NAME} WHERE rowid = 2 * new.id + 1; END")
+    op.execute("CREATE TRIGGER organisations_search_delete AFTER DELETE ON organisations BEGIN "
+               "DELETE FROM search_index WHERE rowid = 2 * old.id + 1; END")
+    op.execute(f"INSERT INTO search_index (rowid, name) SELECT 2 * id, {PERSON_NAME.replace('new.', '')} FROM persons")
+    op.execute(f"INSERT INTO search_index (rowid, name) "
+               f"SELECT 2 * id + 1, {ORGANISATION_NAME.replace('new.', '')} FROM organisations")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for trigger in ("persons_search_insert", "persons_search_update", "persons_search_delete",
+                    "organisations_search_insert", "organisations_search_update", "organisations_search_delete"):
+        op.execute(f"DROP TRIGGER {trigger}")
+    op.execute("DROP TABLE search_index")
@@ -0,0 +1,115 @@
+"""enum codes
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 16:05:12.514907
+
+Enum columns hold SMALLINT codes (see sql_app.enum_codec) instead of member names. Every column gets a code column
+that is filled in chunks of CHUNK_SIZE ids, each chunk committed on its own so the split time table is not locked
+by one long UPDATE; the name column is then dropped and the code column takes its name. A conversion that was
+interrupted can be started again, columns that are already converted are skipped. The members are frozen here as
+they were at this revision, in code order.
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+CHUNK_SIZE = 50000
+
+EVENT_STATUS = ('PLANNED', 'APPLIED', 'PROPOSED', 'SANCTIONED', 'CANCELED', 'RESCHEDULED')
+EVENT_CLASSIFICATION = ('INTERNATIONAL', 'NATIONAL', 'REGIONAL', 'LOCAL', 'CLUB')
+EVENT_FORM = ('INDIVIDUAL', 'TEAM', 'RELAY')
+RESULT_LIST_STATUS = ('COMPLETE', 'DELTA', 'SNAPSHOT')
+RESULT_LIST_MODE = ('DEFAULT', 'UNORDERED', 'UNORDERED_NO_TIMES')
+SEX = ('F', 'M')
+EVENT_CLASS_STATUS = ('NORMAL', 'DIVIDED', 'JOINED', 'INVALIDATED', 'INVALIDATED_NO_FEE')
+RESULT_STATUS = ('OK', 'FINISHED', 'MISSING_PUNCH', 'DISQUALIFIED', 'DID_NOT_FINISH', 'ACTIVE', 'INACTIVE',
+                 'OVER_TIME', 'SPORTING_WITHDRAWAL', 'NOT_COMPETING', 'MOVED', 'MOVED_UP', 'DID_NOT_START',
+                 'DID_NOT_ENTER', 'CANCELLED')
+SPLIT_TIME_STATUS = ('OK', 'MISSING', 'ADDITIONAL')
+
+# table, column, name of the enum type of 0001, members
+COLUMNS = (
+    ('events', 'status', 'eventstatus', EVENT_STATUS),
+    ('events', 'classification', 'eventclassification', EVENT_CLASSIFICATION),
+    ('events', 'form', 'eventform', EVENT_FORM),
+    ('result_lists', 'status', 'resultliststatustype', RESULT_LIST_STATUS),
+    ('event_classes', 'result_list_mode', 'resultlistmodetype', RESULT_LIST_MODE),
+    ('event_classes', 'status', 'eventclassstatus', EVENT_CLASS_STATUS),
+    ('event_classes', 'sex', 'sextype', SEX),
+    ('persons', 'sex', 'sextype', SEX),
+    ('person_race_results', 'status', 'resultstatus', RESULT_STATUS),
+    ('split_times', 'status', 'splittimestatustype', SPLIT_TIME_STATUS),
+)
+
+
+def _case(column: str, pairs) -> str:
+    return f"CASE {column} " + " ".join(f"WHEN {when} THEN {then}" for when, then in pairs) + " END"
+
+
+def _fill_in_chunks(table: str, column: str, expression: str) -> None:
+    """UPDATE table SET column = expression, CHUNK_SIZE ids at a time."""
+    if context.is_offline_mode():
+        op.execute(f"UPDATE {table} SET {column} = {expression}")
+        return
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        low, high = bind.execute(sa.text(f"SELECT min(id), max(id) FROM {table}")).one()
+        if low is None:
+            return
+        for start in range(low, high + 1, CHUNK_SIZE):
+            bind.execute(sa.text(f"UPDATE {table} SET {column} = {expression} WHERE id >= :start AND id < :stop"),
+                         dict(start=start, stop=start + CHUNK_SIZE))
+
+
+def _column_types(table: str) -> dict:
+    return {column['name']: column['type'] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _replace_column(table: str, column: str, new_type, expression: str, converted_type: type) -> None:
+    """Replace column by a column of new_type set to expression.
+
+    A column that is already of converted_type is skipped, and one that was dropped without its replacement being
+    renamed yet only gets the rename, so an interrupted conversion can be started again.
+    """
+    converted = f'{column}_converted'
+    if not context.is_offline_mode():
+        types = _column_types(table)
+        if column not in types:
+            op.alter_column(table, converted, new_column_name=column)
+            return
+        if isinstance(types[column], converted_type):
+            return
+        if converted in types:
+            op.drop_column(table, converted)  # filled only partly, or with values of the other direction
+    op.add_column(table, sa.Column(converted, new_type, nullable=True))
+    _fill_in_chunks(table, converted, expression)
+    op.drop_column(table, column)
+    op.alter_column(table, converted, new_column_name=column)
+
+
+def upgrade() -> None:
+    for table, column, _, members in COLUMNS:
+        _replace_column(table, column, sa.SmallInteger(),
+                        _case(column, ((f"'{name}'", code) for code, name in enumerate(members, 1))), sa.Integer)
+    if op.get_context().dialect.name == 'postgresql':
+        for type_name in dict.fromkeys(type_name for _, _, type_name, _ in COLUMNS):
+            op.execute(f"DROP TYPE IF EXISTS {type_name}")
+
+
+def downgrade() -> None:
+    postgresql = op.get_context().dialect.name == 'postgresql'
+    for table, column, type_name, members in COLUMNS:
+        enum_type = sa.Enum(*members, name=type_name)
+        enum_type.create(op.get_bind(), checkfirst=True)
+        expression = _case(column, ((code, f"'{name}'") for code, name in enumerate(members, 1)))
+        if postgresql:
+            # the CASE is text, which PostgreSQL does not assign to an enum column implicitly
+            expression = f"CAST({expression} AS {type_name})"
+        _replace_column(table, column, enum_type, expression, sa.String)
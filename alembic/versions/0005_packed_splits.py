@@ -0,0 +1,46 @@
+"""packed splits
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 17:21:40.902613
+
+Race results can hold their split times packed into one value (see sql_app.packed_splits) instead of split_times
+rows. Existing race results keep their rows, the column stays NULL for them. The downgrade writes packed split
+times back as rows, decoding the format of this revision.
+"""
+import struct
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('person_race_results', sa.Column('packed_splits', sa.LargeBinary(), nullable=True))
+
+
+def _unpack(packed: bytes):
+    """(status code, control code, time) of every split time."""
+    count, = struct.unpack_from('<I4x', packed)
+    times = struct.unpack_from(f'<{count}d', packed, 8)
+    statuses = packed[8 + 8 * count:8 + 9 * count]
+    control_codes = packed[8 + 9 * count:].decode().split('\0') if count else []
+    return zip(statuses, control_codes, times)
+
+
+def downgrade() -> None:
+    split_times = sa.table('split_times', sa.column('result', sa.Integer), sa.column('status', sa.SmallInteger),
+                           sa.column('control_code', sa.String), sa.column('time', sa.Float))
+    packed_results = op.get_bind().execute(sa.text(
+        'SELECT id, packed_splits FROM person_race_results WHERE packed_splits IS NOT NULL ORDER BY id')).all()
+    rows = [dict(result=race_result_id, status=status, control_code=control_code, time=None if time != time else time)
+            for race_result_id, packed in packed_results for status, control_code, time in _unpack(packed)]
+    if rows:
+        op.bulk_insert(split_times, rows)
+    op.drop_column('person_race_results', 'packed_splits')
@@ -0,0 +1,133 @@
+"""duration milliseconds
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 18:47:26.630417
+
+Durations are stored as integer milliseconds (see sql_app.durations) instead of floating-point seconds: race result
+times and times behind, split times, the time resolution of classes and the times of packed split times, which
+become int32 with MISSING for no time. Like 0004, every column is converted into a new column in chunks of
+CHUNK_SIZE ids, each chunk committed on its own, before it replaces the old one, and columns that already have the
+type of their unit are skipped. Packed splits are converted in place; their layout version (see
+sql_app.packed_splits) says whether a value holds seconds (0) or milliseconds (1), so each value is converted once.
+The conversion can therefore be started again after it was interrupted.
+"""
+import struct
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+CHUNK_SIZE = 50000
+
+# table, column, type before this revision
+COLUMNS = (
+    ('class_results', 'time_resolution', sa.Float()),
+    ('person_race_results', 'time', sa.Double()),
+    ('person_race_results', 'time_behind', sa.Double()),
+    ('split_times', 'time', sa.Double()),
+)
+MISSING = -2 ** 31
+
+
+def _chunks(table: str):
+    """(start, stop) id ranges of CHUNK_SIZE ids covering the table."""
+    low, high = op.get_bind().execute(sa.text(f"SELECT min(id), max(id) FROM {table}")).one()
+    return [] if low is None else [(start, start + CHUNK_SIZE) for start in range(low, high + 1, CHUNK_SIZE)]
+
+
+def _fill_in_chunks(table: str, column: str, expression: str) -> None:
+    """UPDATE table SET column = expression, CHUNK_SIZE ids at a time."""
+    if context.is_offline_mode():
+        op.execute(f"UPDATE {table} SET {column} = {expression}")
+        return
+    with op.get_context().autocommit_block():
+        for start, stop in _chunks(table):
+            op.get_bind().execute(sa.text(
+                f"UPDATE {table} SET {column} = {expression} WHERE id >= :start AND id < :stop"),
+                dict(start=start, stop=stop))
+
+
+def _convert_in_chunks(table: str, column: str, convert) -> None:
+    """Set column to convert(column) where that is not None, CHUNK_SIZE ids at a time."""
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        for start, stop in _chunks(table):
+            rows = bind.execute(sa.text(
+                f"SELECT id, {column} FROM {table} WHERE {column} IS NOT NULL AND id >= :start AND id < :stop"),
+                dict(start=start, stop=stop)).all()
+            values = [dict(id=row_id, value=converted) for row_id, converted in
+                      ((row_id, convert(value)) for row_id, value in rows) if converted is not None]
+            if values:
+                bind.execute(sa.text(f"UPDATE {table} SET {column} = :value WHERE id = :id"), values)
+
+
+def _column_types(table: str) -> dict:
+    return {column['name']: column['type'] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _replace_column(table: str, column: str, new_type, expression: str, converted_type: type) -> None:
+    """Replace column by a column of new_type set to expression, skipping a column of converted_type (see 0004)."""
+    converted = f'{column}_converted'
+    if not context.is_offline_mode():
+        types = _column_types(table)
+        if column not in types:
+            op.alter_column(table, converted, new_column_name=column)
+            return
+        if isinstance(types[column], converted_type):
+            return
+        if converted in types:
+            op.drop_column(table, converted)
+    op.add_column(table, sa.Column(converted, new_type, nullable=True))
+    _fill_in_chunks(table, converted, expression)
+    op.drop_column(table, column)
+    op.alter_column(table, converted, new_column_name=column)
+
+
+def _packed_to_milliseconds(packed: bytes):
+    """The packed splits with int32 milliseconds, None if they have them already."""
+    count, version = struct.unpack_from('<IB3x', packed)
+    if version:
+        return None
+    times = struct.unpack_from(f'<{count}d', packed, 8)
+    return struct.pack(f'<IB3x{count}i', count, 1, *(MISSING if time != time else round(time * 1000)
+                                                       for time in times)) + packed[8 + 8 * count:]
+
+
+def _packed_to_seconds(packed: bytes):
+    """The packed splits with float64 seconds, None if they have them already."""
+    count, version = struct.unpack_from('<IB3x', packed)
+    if not version:
+        return None
+    times = struct.unpack_from(f'<{count}i', packed, 8)
+    return struct.pack(f'<IB3x{count}d', count, 0, *(float('nan') if time == MISSING else time / 1000
+                                                       for time in times)) + packed[8 + 4 * count:]
+
+
+def _convert_packed_splits(convert) -> None:
+    if context.is_offline_mode():
+        op.execute("-- packed_splits of person_race_results are not converted in offline mode")
+        return
+    _convert_in_chunks('person_race_results', 'packed_splits', convert)
+
+
+def upgrade() -> None:
+    for table, column, _ in COLUMNS:
+        _replace_column(table, column, sa.Integer(), f'CAST(round({column} * 1000) AS INTEGER)', sa.Integer)
+    _convert_packed_splits(_packed_to_milliseconds)
+    with op.batch_alter_table('class_results') as batch_op:
+        batch_op.alter_column('time_resolution', existing_type=sa.Integer(), nullable=False)
+
+
+def downgrade() -> None:
+    for table, column, old_type in COLUMNS:
+        _replace_column(table, column, old_type, f'{column} / 1000.0', sa.Float)
+    _convert_packed_splits(_packed_to_seconds)
+    with op.batch_alter_table('class_results') as batch_op:
+        batch_op.alter_column('time_resolution', existing_type=sa.Float(), nullable=False)
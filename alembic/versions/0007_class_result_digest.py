@@ -0,0 +1,27 @@
+"""class result digest
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 21:12:08.417530
+
+Class results store the digest of their imported person results, so the importer leaves an unchanged class and its
+version alone (see sql_app.crud.replace_class_result). Existing class results have none and are written again by
+their next import.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('class_results', sa.Column('digest', sa.String(length=32), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('class_results', 'digest')
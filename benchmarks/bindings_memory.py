@@ -0,0 +1,106 @@
+"""Compare memory and parse time of the generateDS bindings `models` and their compact variant `models_compact`.
+
+A synthetic result list (10,000 runners by default) is written as IOF XML and parsed by each parser in PARSERS in
+fresh interpreters: one run measures the parse time and the growth of the peak resident set size, which includes
+the lxml tree (Linux only), one run traces the Python objects with tracemalloc::
+
+    python -m benchmarks.bindings_memory --classes 100 --runners 100 --output bindings_memory.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from .fixture import ROOT, result_list_document, result_list_xml
+
+PARSERS = ("models.parse", "models_compact.parse", "models_compact.iterparse")
+
+
+def memory_status(field: str) -> float:
+    """A field of /proc/self/status in MB, e.g. VmRSS (resident set size) or VmHWM (its peak)."""
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 2 ** 10
+    raise KeyError(field)
+
+
+def measure(parser_name: str, filename: str, trace: bool) -> dict:
+    """Parse `filename` with `parser_name` in this interpreter; called in a fresh one by `run`."""
+    import gc
+    import importlib
+    import time
+    import tracemalloc
+
+    module_name, function_name = parser_name.rsplit(".", 1)
+    parse = getattr(importlib.import_module(module_name), function_name)
+    gc.collect()
+    with open("/proc/self/clear_refs", "w") as clear_refs:
+        clear_refs.write("5")  # reset the peak to the current resident set size, e.g. after compiling the bindings
+    rss_before = memory_status("VmRSS")
+    if trace:
+        tracemalloc.start()
+    started = time.perf_counter()
+    root = parse(filename, silence=True, print_warnings=False)
+    seconds = time.perf_counter() - started
+    gc.collect()
+    if trace:
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        runners = sum(len(class_result.PersonResult) for class_result in root.ClassResult)
+        return {"python_retained_mb": retained / 2 ** 20, "python_peak_mb": peak / 2 ** 20,
+                "python_retained_bytes_per_runner": retained / runners}
+    return {"parse_s": seconds,
+            "rss_before_mb": rss_before,
+            "peak_rss_mb": memory_status("VmHWM")}
+
+
+def run(parser_name: str, filename: Path, trace: bool) -> dict:
+    environment = {**os.environ,
+                   "PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")]))}
+    command = [sys.executable, "-m", "benchmarks.bindings_memory", "--measure", parser_name, str(filename)]
+    process = subprocess.run(command + (["--trace"] if trace else []), cwd=ROOT, env=environment, check=True,
+                             stdout=subprocess.PIPE, text=True)
+    return json.loads(process.stdout)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--classes", type=int, default=100)
+    parser.add_argument("--runners", type=int, default=100)
+    parser.add_argument("--controls", type=int, default=15)
+    parser.add_argument("--output", type=Path, default=Path("bindings_memory.json"))
+    parser.add_argument("--measure", nargs=2, metavar=("PARSER", "FILE"), help=argparse.SUPPRESS)
+    parser.add_argument("--trace", action="store_true", help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.measure:
+        print(json.dumps(measure(*arguments.measure, trace=arguments.trace)))
+        sys.exit()
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = Path(directory) / "result_list.xml"
+        filename.write_bytes(result_list_xml(result_list_document(arguments.classes, arguments.runners,
+                                                                  arguments.controls)))
+        size_mb = filename.stat().st_size / 2 ** 20
+        results = [{"parser": parser_name, **run(parser_name, filename, trace=False),
+                    **run(parser_name, filename, trace=True)} for parser_name in PARSERS]
+
+    arguments.output.write_text(json.dumps({
+        "python": platform.python_version(),
+        "machine": {"platform": platform.platform(), "cpus": os.cpu_count()},
+        "input": {"runners": arguments.classes * arguments.runners, "controls": arguments.controls,
+                  "size_mb": size_mb},
+        "results": results,
+    }, indent=2))
+
+    print(f"{arguments.classes * arguments.runners} runners, {size_mb:.1f} MB of XML")
+    print(f"{'parser':<25} {'parse s':>8} {'peak RSS +MB':>13} {'objects MB':>11} {'bytes/runner':>13}")
+    for result in results:
+        print(f"{result['parser']:<25} {result['parse_s']:>8.2f} "
+              f"{result['peak_rss_mb'] - result['rss_before_mb']:>13.1f} {result['python_retained_mb']:>11.1f} "
+              f"{result['python_retained_bytes_per_runner']:>13.0f}")
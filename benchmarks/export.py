@@ -0,0 +1,101 @@
+"""Compare the streaming IOF XML export with the export of the generateDS bindings.
+
+A fixture database is exported with `export.write_result_list_xml`, straight from the SQL rows. The same document
+is then parsed into a `models` object tree and written with `ResultList.export`; building the tree is not timed,
+so the comparison favours the bindings. Peak memory of either export is traced with tracemalloc in separate
+runs; for the bindings it includes the object tree the export needs::
+
+    python -m benchmarks.export --classes 50 --runners 100
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from .fixture import create_fixture
+
+
+def best_of(runs: int, write) -> tuple[float, int]:
+    """Shortest time of `runs` calls of write(out) and the size of the document written."""
+    durations = []
+    for _ in range(runs):
+        out = io.BytesIO()
+        started = time.perf_counter()
+        write(out)
+        durations.append(time.perf_counter() - started)
+    return min(durations), len(out.getvalue())
+
+
+def traced_peak(write) -> float:
+    """Peak of memory allocated while writing, in MB, not counting the written document."""
+
+    class Discard(io.RawIOBase):
+        def writable(self):
+            return True
+
+        def write(self, data):
+            return len(data)
+
+    tracemalloc.start()
+    write(Discard())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--classes", type=int, default=50)
+    parser.add_argument("--runners", type=int, default=100)
+    parser.add_argument("--controls", type=int, default=15)
+    parser.add_argument("--runs", type=int, default=3)
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # before the first import of sql_app, which creates the engines
+        os.environ["EVENT_PRESENTER_DATABASE_URL"] = f"sqlite:///{Path(directory) / 'fixture.db'}"
+        create_fixture(arguments.classes, arguments.runners, arguments.controls)
+
+        import models
+        from sql_app.database import SessionLocal
+        from sql_app.export import write_result_list_xml
+
+        db = SessionLocal()
+        try:
+            def streaming(out):
+                write_result_list_xml(db, 1, out)
+
+            streaming_s, size = best_of(arguments.runs, streaming)
+            streaming_peak = traced_peak(streaming)
+
+            document = Path(directory) / "result_list.xml"
+            with document.open("wb") as out:
+                streaming(out)
+        finally:
+            db.close()
+
+        tracemalloc.start()
+        tree = models.parse(str(document), silence=True, print_warnings=False)
+        tree_mb = tracemalloc.get_traced_memory()[0] / 2 ** 20
+        tracemalloc.stop()
+
+        def bindings(out):
+            text = io.TextIOWrapper(out, encoding="utf-8", write_through=True)
+            text.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+            tree.export(text, 0, name_="ResultList",
+                        namespacedef_='xmlns="http://www.orienteering.org/datastandard/3.0"')
+            text.detach()
+
+        bindings_s, bindings_size = best_of(arguments.runs, bindings)
+        bindings_peak = tree_mb + traced_peak(bindings)
+
+    runners = arguments.classes * arguments.runners
+    print(f"{runners} runners, {runners * arguments.controls} split times")
+    print(f"{'export':<28} {'seconds':>8} {'MB':>6} {'MB/s':>6} {'runners/s':>10} {'peak MB':>8}")
+    for name, seconds, written, peak in (("streaming from SQL", streaming_s, size, streaming_peak),
+                                         ("generateDS tree (prebuilt)", bindings_s, bindings_size, bindings_peak)):
+        print(f"{name:<28} {seconds:>8.3f} {written / 2 ** 20:>6.1f} {written / 2 ** 20 / seconds:>6.1f} "
+              f"{runners / seconds:>10.0f} {peak:>8.2f}")
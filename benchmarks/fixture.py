@@ -0,0 +1,116 @@
+"""Generate a fixture database with a synthetic result list.
+
+The result list is built as the document the importer gets from xmlschema and goes through the regular import, so
+the fixture has the same rankings, versions and search index as a real event::
+
+    EVENT_PRESENTER_DATABASE_URL=sqlite:////tmp/fixture.db python -m benchmarks.fixture --classes 40 --runners 60
+
+With --xml the result list is written as an IOF XML file instead, e.g. as input of the importer or the bindings.
+The database URL is taken from the environment like everywhere else, so the variable has to be set before
+`sql_app` is imported.
+"""
+import argparse
+import datetime
+import random
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+IOF_NAMESPACE = "http://www.orienteering.org/datastandard/3.0"
+
+FAMILY_NAMES = ("Müller", "Schmidt", "Schneider", "Fischer", "Weber", "Meyer", "Wagner", "Becker", "Schulz",
+                "Hoffmann", "Koch", "Richter", "Klein", "Wolf", "Neumann", "Schwarz", "Zimmermann", "Braun")
+GIVEN_NAMES = ("Anna", "Ben", "Clara", "David", "Emma", "Felix", "Greta", "Henry", "Ida", "Jonas", "Lena", "Max",
+               "Mia", "Paul", "Sophie", "Tom")
+STATUSES = ("OK",) * 18 + ("MissingPunch", "DidNotFinish")
+
+
+def result_list_document(classes: int, runners: int, controls: int, clubs: int = 50, seed: int = 0) -> dict:
+    """A ResultList document of `classes` classes with `runners` runners punching `controls` controls each."""
+    generator = random.Random(seed)
+    start = datetime.datetime(2026, 1, 1, 10)
+    class_results = []
+    for class_number in range(classes):
+        codes = [str(31 + generator.randrange(150)) for _ in range(controls)]
+        person_results = []
+        for runner in range(runners):
+            legs = [generator.uniform(60, 400) for _ in range(controls + 1)]
+            cumulative = [round(sum(legs[:leg + 1])) for leg in range(controls + 1)]
+            status = generator.choice(STATUSES)
+            start_time = start + datetime.timedelta(minutes=runner)
+            person_results.append({
+                "Person": {"@sex": "M" if class_number % 2 else "F",
+                           "Name": {"Family": f"{generator.choice(FAMILY_NAMES)} {class_number}-{runner}",
+                                    "Given": generator.choice(GIVEN_NAMES)}},
+                "Organisation": {"Name": f"Club {generator.randrange(clubs)}"},
+                "Result": [{
+                    "BibNumber": f"{class_number * 1000 + runner}",
+                    "StartTime": start_time.isoformat(),
+                    "FinishTime": (start_time + datetime.timedelta(seconds=cumulative[-1])).isoformat(),
+                    "Time": cumulative[-1],
+                    "Status": status,
+                    "SplitTime": [{"ControlCode": code, "Time": time} if status == "OK" or leg % 3 else
+                                  {"@status": "Missing", "ControlCode": code}
+                                  for leg, (code, time) in enumerate(zip(codes, cumulative))],
+                }],
+            })
+        class_results.append({
+            # attributes with schema defaults, which xmlschema fills in
+            "Class": {"@minNumberOfTeamMembers": 1, "@maxNumberOfTeamMembers": 1,
+                      "Name": f"Class {class_number}", "ShortName": f"C{class_number}"},
+            "Course": [{"Name": f"Course {class_number}", "NumberOfControls": controls}],
+            "PersonResult": person_results,
+        })
+    return {
+        "@createTime": "2026-01-01T12:00:00.000",
+        "@creator": "benchmarks.fixture",
+        "@status": "Complete",
+        "Event": {"Name": "Benchmark"},
+        "ClassResult": class_results,
+    }
+
+
+def result_list_xml(document: dict) -> bytes:
+    """`document` as an IOF XML file: @keys become attributes, lists repeated elements, other values text."""
+    from xml.etree import ElementTree
+
+    def fill(element, content):
+        if not isinstance(content, dict):
+            element.text = str(content)
+            return
+        for key, value in content.items():
+            if key.startswith("@"):
+                element.set(key[1:], str(value))
+                continue
+            for item in value if isinstance(value, list) else [value]:
+                fill(ElementTree.SubElement(element, key), item)
+
+    root = ElementTree.Element("ResultList", xmlns=IOF_NAMESPACE, iofVersion="3.0")
+    fill(root, document)
+    return ElementTree.tostring(root, encoding="UTF-8", xml_declaration=True)
+
+
+def create_fixture(classes: int, runners: int, controls: int, seed: int = 0):
+    """Migrate the database of EVENT_PRESENTER_DATABASE_URL to the latest schema and import a result list."""
+    from alembic import command
+    from alembic.config import Config
+    from importer.result_list import import_dict
+
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    command.upgrade(config, "head")
+    import_dict(result_list_document(classes, runners, controls, seed=seed))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--classes", type=int, default=40)
+    parser.add_argument("--runners", type=int, default=60)
+    parser.add_argument("--controls", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--xml", type=Path, help="write the result list to this file instead of a database")
+    arguments = parser.parse_args()
+    if arguments.xml:
+        arguments.xml.write_bytes(result_list_xml(result_list_document(arguments.classes, arguments.runners,
+                                                                       arguments.controls, seed=arguments.seed)))
+    else:
+        create_fixture(arguments.classes, arguments.runners, arguments.controls, arguments.seed)
@@ -0,0 +1,70 @@
+"""Drive an API endpoint at increasing concurrency and report throughput and latency.
+
+Start the API first, e.g. ``uvicorn sql_app.main:app``, then run::
+
+    python -m benchmarks.load_test http://127.0.0.1:8000 /result_lists/1/classes/1 --levels 1 8 32 128 256
+
+The concurrency ceiling is the level from which throughput stops growing while latency keeps rising. To run all
+endpoints against a fixture database and keep the numbers, use benchmarks.suite.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def worker(client: httpx.AsyncClient, path: str, deadline: float, latencies: list[float], errors: list[int]):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+                continue
+        except httpx.HTTPError:
+            errors.append(0)
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+async def run_level(base_url: str, path: str, concurrency: int, duration: float) -> dict:
+    latencies: list[float] = []
+    errors: list[int] = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(worker(client, path, deadline, latencies, errors) for _ in range(concurrency)))
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [float("nan")] * 99
+    attempts = len(latencies) + len(errors)
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": len(errors),
+        # status code -> count; 0 counts connection errors and timeouts
+        "error_statuses": {str(status): errors.count(status) for status in sorted(set(errors))},
+        "error_rate": len(errors) / attempts if attempts else 0.0,
+        "throughput": len(latencies) / duration,
+        "p50_ms": quantiles[49] * 1000,
+        "p95_ms": quantiles[94] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+    }
+
+
+async def main(base_url: str, path: str, levels: list[int], duration: float):
+    print(f"{'concurrency':>11} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for concurrency in levels:
+        result = await run_level(base_url, path, concurrency, duration)
+        print(f"{result['concurrency']:>11} {result['throughput']:>9.1f} {result['p50_ms']:>9.1f} "
+              f"{result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f} {result['errors']:>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base_url")
+    parser.add_argument("path")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 8, 32, 128, 256])
+    parser.add_argument("--duration", type=float, default=5.0)
+    arguments = parser.parse_args()
+    asyncio.run(main(arguments.base_url, arguments.path, arguments.levels, arguments.duration))
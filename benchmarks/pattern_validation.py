@@ -0,0 +1,99 @@
+"""Microbenchmark of pattern validation in the generateDS bindings, with and without the compiled pattern cache.
+
+The IOF schema itself restricts simple types by enumerations only, so the patterns here are the ones generateDS
+would emit for pattern facets on the split values of a synthetic document with 10,000 split times. Every value is
+validated by `GeneratedsSuper.gds_validate_simple_patterns` and by the previous implementation, which looked each
+pattern up in the cache of the re module and compared match lengths. In the second scenario every value is also
+checked against one of more patterns than that cache holds, as in a large schema::
+
+    python -m benchmarks.pattern_validation --classes 10 --runners 100 --controls 10
+"""
+import argparse
+import re
+import tempfile
+import time
+from pathlib import Path
+
+from .fixture import result_list_document, result_list_xml
+
+PATTERNS = {
+    "ControlCode": [[r"^([0-9A-Z]{1,10})$"]],
+    "Time": [[r"^([0-9]+(\.[0-9]+)?)$"]],
+    "DateTime": [[r"^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+-]\d{2}:\d{2})?)$"]],
+}
+# More distinct patterns than re caches (re._MAXCACHE is 512 in Python 3.11)
+OTHER_PATTERNS = [[[rf"^(C{number}-[0-9]+)$"]] for number in range(600)]
+
+
+def search_patterns(patterns, target) -> bool:
+    """The previous gds_validate_simple_patterns."""
+    found1 = True
+    target = str(target)
+    for patterns1 in patterns:
+        found2 = False
+        for patterns2 in patterns1:
+            mo = re.search(patterns2, target)
+            if mo is not None and len(mo.group(0)) == len(target):
+                found2 = True
+                break
+        if not found2:
+            found1 = False
+            break
+    return found1
+
+
+def document_values(classes: int, runners: int, controls: int) -> list[tuple[str, object]]:
+    """(simple type, value) of the start and finish times and every split time of a parsed result list."""
+    import models_compact
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = Path(directory) / "result_list.xml"
+        filename.write_bytes(result_list_xml(result_list_document(classes, runners, controls)))
+        result_list = models_compact.iterparse(str(filename), silence=True)
+    values = []
+    for class_result in result_list.ClassResult:
+        for person_result in class_result.PersonResult:
+            for result in person_result.Result:
+                values += [("DateTime", result.StartTime.isoformat()), ("DateTime", result.FinishTime.isoformat())]
+                for split_time in result.SplitTime:
+                    values.append(("ControlCode", split_time.ControlCode))
+                    if split_time.Time is not None:
+                        values.append(("Time", split_time.Time))
+    return values
+
+
+def best_of(runs: int, validate, checks) -> float:
+    durations = []
+    for _ in range(runs):
+        re.purge()
+        started = time.perf_counter()
+        for patterns, value in checks:
+            validate(patterns, value)
+        durations.append(time.perf_counter() - started)
+    return min(durations)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--classes", type=int, default=10)
+    parser.add_argument("--runners", type=int, default=100)
+    parser.add_argument("--controls", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=5)
+    arguments = parser.parse_args()
+
+    import models
+
+    validator = models.GeneratedsSuper()
+    values = document_values(arguments.classes, arguments.runners, arguments.controls)
+    checks = [(PATTERNS[simple_type], value) for simple_type, value in values]
+    with_other = [check for index, check in enumerate(checks)
+                  for check in (check, (OTHER_PATTERNS[index % len(OTHER_PATTERNS)], f"C{index}-1"))]
+    assert all(validator.gds_validate_simple_patterns(*check) == search_patterns(*check) for check in with_other)
+
+    splits = sum(simple_type == "ControlCode" for simple_type, _ in values)
+    print(f"{len(values)} values, {splits} split times")
+    print(f"{'scenario':<32} {'re.search':>10} {'compiled':>10} {'speed-up':>9}")
+    for scenario, scenario_checks in (("document patterns", checks), ("plus 600 other patterns", with_other)):
+        before = best_of(arguments.runs, search_patterns, scenario_checks)
+        after = best_of(arguments.runs, validator.gds_validate_simple_patterns, scenario_checks)
+        print(f"{scenario:<32} {before * 1000:>8.1f} ms {after * 1000:>7.1f} ms {before / after:>8.1f}x")
@@ -0,0 +1,148 @@
+"""Check the query budgets of the API endpoints and crud functions against a fixture database.
+
+Every route of the API is requested twice, once fresh and once revalidating with its entity tag, each time with
+an expired version snapshot, and must stay within its budget in ENDPOINT_BUDGETS. The crud functions in
+CRUD_BUDGETS are called on a class of the fixture. Any statement shape repeated more than
+`querybudget.REPEAT_LIMIT` times is reported as an N+1 pattern::
+
+    python -m benchmarks.query_budgets
+
+Exits with status 1 if a budget is exceeded or a route has no budget. benchmarks.test_query_budgets runs the same
+checks as a unit test.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from .fixture import create_fixture
+
+# Most queries a request may run, by route, including a reload of the version snapshot (2 queries); a route
+# without a budget fails the check.
+ENDPOINT_BUDGETS = {
+    ("POST", "/events/"): 3,
+    ("GET", "/events/"): 1,
+    ("GET", "/result_lists/"): 3,
+    ("GET", "/result_lists/{result_list_id}.xml"): 4,
+    ("GET", "/result_lists/{result_list_id}/classes/{class_id}"): 5,
+    ("GET", "/result_lists/{result_list_id}/classes/{class_id}/splits"): 5,
+    ("GET", "/result_lists/{result_list_id}/classes/{class_id}/time_loss"): 5,
+    ("GET", "/presenter/{event_id}/pages"): 4,
+    ("GET", "/search"): 3,
+    ("GET", "/metrics"): 0,
+    # the version watcher polls for all subscribers; the stream itself never queries
+    ("GET", "/events/{event_id}/changes"): 0,
+}
+# Most queries per call of the crud functions whose cost must not grow with the size of a class
+CRUD_BUDGETS = {
+    "replace_class_result": 9,
+    "replace_person_results": 6,
+    "rank_class_result": 1,
+    "bump_class_result_version": 1,
+    "bump_result_list_version": 1,
+}
+
+# Sample values for the path and query parameters of the routes; the fixture has event 1, result list 1, class 1
+PATH_PARAMETERS = {"event_id": 1, "result_list_id": 1, "class_id": 1}
+QUERY_PARAMETERS = {"/search": {"q": "mül"}}
+# Routes that are budgeted but cannot be requested to completion
+STREAMING = {("GET", "/events/{event_id}/changes")}
+
+
+def check_endpoints(runners: int) -> list[str]:
+    from fastapi.routing import APIRoute
+    from fastapi.testclient import TestClient
+
+    from sql_app.database import engine, async_engine
+    from sql_app.main import app, versions
+    from .querybudget import query_budget, QueryBudgetExceeded
+
+    problems = []
+    with TestClient(app) as client:
+        for route in app.routes:
+            if not isinstance(route, APIRoute):
+                continue
+            for method in sorted(route.methods):
+                key = (method, route.path)
+                if key not in ENDPOINT_BUDGETS:
+                    problems.append(f"{method} {route.path} has no query budget")
+                    continue
+                if key in STREAMING:
+                    continue
+                path = route.path.format(**PATH_PARAMETERS)
+                body = {"name": f"Budget {time.time_ns()}"} if method == "POST" else None
+                headers = {}
+                for attempt in ("fresh", "revalidated"):
+                    label = f"{method} {path} ({attempt}, {runners} runners)"
+                    versions.expire()  # worst case: the request reloads the version snapshot
+                    try:
+                        with query_budget(ENDPOINT_BUDGETS[key], engine, async_engine.sync_engine, label=label) as log:
+                            response = client.request(method, path, params=QUERY_PARAMETERS.get(route.path),
+                                                      json=body, headers=headers)
+                    except QueryBudgetExceeded as exceeded:
+                        problems.append(str(exceeded))
+                        break
+                    if response.status_code >= 400:
+                        problems.append(f"{label} failed with status {response.status_code}")
+                        break
+                    print(f"{label:<80} {len(log):>3} / {ENDPOINT_BUDGETS[key]}")
+                    if "ETag" not in response.headers:
+                        break
+                    headers = {"If-None-Match": response.headers["ETag"]}
+    return problems
+
+
+def check_crud(runners: int) -> list[str]:
+    from sql_app import crud, schemas
+    from sql_app.database import engine, SessionLocal
+    from .querybudget import query_budget, QueryBudgetExceeded
+
+    db = SessionLocal()
+    person_results = [schemas.PersonResultCreate(
+        person=1, organisation=1,
+        race_results=[schemas.PersonRaceResultCreate(
+            time=1000 + runner, status="OK",
+            split_times=[schemas.SplitTimeCreate(control_code=str(31 + control), time=60 * (control + 1))
+                         for control in range(15)])])
+        for runner in range(runners)]
+    calls = {
+        "replace_class_result": lambda: crud.replace_class_result(db, 1, person_results),
+        "replace_person_results": lambda: crud.replace_person_results(db, 1, person_results),
+        "rank_class_result": lambda: crud.rank_class_result(db, 1),
+        "bump_class_result_version": lambda: crud.bump_class_result_version(db, 1),
+        "bump_result_list_version": lambda: crud.bump_result_list_version(db, 1),
+    }
+    problems = [f"crud.{name} has no query budget" for name in calls if name not in CRUD_BUDGETS]
+    try:
+        for name, budget in CRUD_BUDGETS.items():
+            label = f"crud.{name} ({runners} runners)"
+            try:
+                with query_budget(budget, engine, label=label) as log:
+                    calls[name]()
+            except QueryBudgetExceeded as exceeded:
+                problems.append(str(exceeded))
+                continue
+            print(f"{label:<80} {len(log):>3} / {budget}")
+    finally:
+        db.close()
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--classes", type=int, default=5)
+    parser.add_argument("--runners", type=int, default=60)
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # before the first import of sql_app, which creates the engines
+        os.environ["EVENT_PRESENTER_DATABASE_URL"] = f"sqlite:///{Path(directory) / 'fixture.db'}"
+        create_fixture(arguments.classes, arguments.runners, controls=15)
+        problems = check_endpoints(arguments.runners) + check_crud(arguments.runners)
+
+    if problems:
+        print("\n\n".join(problems), file=sys.stderr)
+        sys.exit(1)
+    print("All query budgets kept")
@@ -0,0 +1,84 @@
+"""Query budgets: count the SQL statements of a block of code and catch N+1 patterns.
+
+Statements are fingerprinted (literals and expanded IN lists replaced by placeholders), so the same query run for
+every row of a result shows up as one fingerprint with a high count::
+
+    with query_budget(1, engine):
+        crud.rank_class_result(db, 1)
+
+raises QueryBudgetExceeded if the block runs more than 1 statement or one statement shape more than
+REPEAT_LIMIT times. The budgets of the API endpoints and crud functions are declared and checked in
+`benchmarks.query_budgets`.
+"""
+import re
+from collections import Counter
+from contextlib import contextmanager
+
+from sqlalchemy import event, Engine
+
+# A statement shape run more often than this within one block is treated as an N+1 pattern
+REPEAT_LIMIT = 5
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)\s*,)+\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def fingerprint(statement: str) -> str:
+    """Shape of a statement: literals become ?, placeholder lists become (?+), whitespace is collapsed."""
+    statement = _LITERALS.sub("?", statement)
+    statement = _PLACEHOLDER_LISTS.sub("(?+)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+class QueryLog:
+    def __init__(self):
+        self.statements: list[str] = []
+
+    def __len__(self):
+        return len(self.statements)
+
+    def fingerprints(self) -> Counter:
+        return Counter(fingerprint(statement) for statement in self.statements)
+
+    def repeated(self, limit: int = REPEAT_LIMIT) -> dict[str, int]:
+        """Statement shapes run more than `limit` times."""
+        return {shape: count for shape, count in self.fingerprints().items() if count > limit}
+
+    def check(self, budget: int, repeat_limit: int = REPEAT_LIMIT, label: str = "block"):
+        problems = []
+        if len(self) > budget:
+            problems.append(f"{label} ran {len(self)} queries, budget is {budget}")
+        for shape, count in self.repeated(repeat_limit).items():
+            problems.append(f"{label} ran the same statement {count} times (N+1?): {shape}")
+        if problems:
+            raise QueryBudgetExceeded("\n".join(problems + ["Statements:"] + self.statements))
+
+
+@contextmanager
+def count_queries(*engines: Engine):
+    """Log the statements run on `engines` (sync engines; use `AsyncEngine.sync_engine`) within the block."""
+    log = QueryLog()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        log.statements.append(statement)
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield log
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", record)
+
+
+@contextmanager
+def query_budget(budget: int, *engines: Engine, repeat_limit: int = REPEAT_LIMIT, label: str = "block"):
+    """Fail with QueryBudgetExceeded if the block runs more than `budget` statements or repeats one too often."""
+    with count_queries(*engines) as log:
+        yield log
+    log.check(budget, repeat_limit, label)
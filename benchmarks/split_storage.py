@@ -0,0 +1,119 @@
+"""Compare the split time layouts: one split_times row per punch and splits packed into their race result.
+
+For every layout in packed_splits.SPLIT_STORAGES a fixture database is imported in a fresh interpreter, vacuumed
+and measured: the size of the split times and race results including their indexes (from SQLite's dbstat), and the
+latency of loading a class, both the split columns of the analysis and the JSON class standing::
+
+    python -m benchmarks.split_storage --classes 50 --runners 100 --controls 25 --output split_storage.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from .fixture import ROOT
+
+TABLES = ("split_times", "person_race_results")
+
+
+def table_sizes(filename: str) -> dict[str, int]:
+    """Bytes of the pages of every table in TABLES, including its indexes."""
+    import sqlite3
+
+    with sqlite3.connect(filename) as connection:
+        connection.execute("VACUUM")
+        sizes = dict(connection.execute(
+            "SELECT master.tbl_name, sum(dbstat.pgsize) FROM dbstat JOIN sqlite_master AS master "
+            "ON dbstat.name = master.name GROUP BY master.tbl_name").fetchall())
+    return {table: sizes.get(table, 0) for table in TABLES}
+
+
+async def class_load_ms(classes: int, runs: int) -> dict[str, float]:
+    """Median milliseconds of loading the splits and of serializing the standing of a class, over all classes."""
+    import statistics
+
+    from sql_app import analysis, serializers
+    from sql_app.database import AsyncSessionLocal
+
+    loads = {"load_class_splits": lambda db, event_class_id: analysis.load_class_splits(db, 1, event_class_id),
+             "class_result_json": lambda db, event_class_id: serializers.class_result_json(db, 1, event_class_id)}
+    durations = {name: [] for name in loads}
+    async with AsyncSessionLocal() as db:
+        for name, load in loads.items():
+            for event_class_id in range(1, classes + 1):
+                for _ in range(runs):
+                    started = time.perf_counter()
+                    await load(db, event_class_id)
+                    durations[name].append(time.perf_counter() - started)
+    return {f"{name}_ms": statistics.median(values) * 1000 for name, values in durations.items()}
+
+
+def measure(classes: int, runners: int, controls: int, runs: int) -> dict:
+    """Import and measure a fixture in this interpreter; called in a fresh one per layout by `run`."""
+    import asyncio
+
+    from .fixture import create_fixture
+
+    started = time.perf_counter()
+    create_fixture(classes, runners, controls)
+    import_s = time.perf_counter() - started
+    from sql_app.database import SQLALCHEMY_DATABASE_URL, async_engine
+
+    latencies = asyncio.run(class_load_ms(classes, runs))
+    asyncio.run(async_engine.dispose())
+    return {"import_s": import_s, "bytes": table_sizes(SQLALCHEMY_DATABASE_URL.removeprefix("sqlite:///")),
+            **latencies}
+
+
+def run(layout: str, directory: str, arguments) -> dict:
+    environment = {**os.environ,
+                   "EVENT_PRESENTER_DATABASE_URL": f"sqlite:///{Path(directory) / layout}.db",
+                   "EVENT_PRESENTER_SPLIT_STORAGE": layout,
+                   "PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")]))}
+    command = [sys.executable, "-m", "benchmarks.split_storage", "--measure", "--classes", str(arguments.classes),
+               "--runners", str(arguments.runners), "--controls", str(arguments.controls), "--runs",
+               str(arguments.runs)]
+    process = subprocess.run(command, cwd=ROOT, env=environment, check=True, stdout=subprocess.PIPE, text=True)
+    return json.loads(process.stdout.splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--classes", type=int, default=50)
+    parser.add_argument("--runners", type=int, default=100)
+    parser.add_argument("--controls", type=int, default=25)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=Path("split_storage.json"))
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.measure:
+        print(json.dumps(measure(arguments.classes, arguments.runners, arguments.controls, arguments.runs)))
+        sys.exit()
+
+    from sql_app.packed_splits import SPLIT_STORAGES
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = [{"layout": layout, **run(layout, directory, arguments)} for layout in SPLIT_STORAGES]
+
+    arguments.output.write_text(json.dumps({
+        "python": platform.python_version(),
+        "machine": {"platform": platform.platform(), "cpus": os.cpu_count()},
+        "input": {"classes": arguments.classes, "runners": arguments.runners, "controls": arguments.controls},
+        "results": results,
+    }, indent=2))
+
+    runners = arguments.classes * arguments.runners
+    print(f"{runners} runners, {runners * arguments.controls} split times")
+    print(f"{'layout':<8} {'import s':>9} {'split_times MB':>15} {'race results MB':>16} {'total MB':>9} "
+          f"{'load splits ms':>15} {'class JSON ms':>14}")
+    for result in results:
+        sizes = result["bytes"]
+        print(f"{result['layout']:<8} {result['import_s']:>9.2f} {sizes['split_times'] / 2 ** 20:>15.2f} "
+              f"{sizes['person_race_results'] / 2 ** 20:>16.2f} {sum(sizes.values()) / 2 ** 20:>9.2f} "
+              f"{result['load_class_splits_ms']:>15.2f} {result['class_result_json_ms']:>14.2f}")
@@ -0,0 +1,166 @@
+"""Measure cold start times of the importer CLI and the API and check them against targets.
+
+Every command runs in a fresh interpreter several times; the median wall time is compared with its target in
+TARGETS. One extra run per command with ``-X importtime`` records which modules the time goes to::
+
+    python -m benchmarks.startup --output startup.json --check
+
+With --check the exit status is 1 if a command is slower than its target.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from .fixture import ROOT
+from .suite import free_port
+
+# Median wall time in seconds; interpreter start alone is about 0.03 s
+TARGETS = {
+    "interpreter": 0.1,
+    "importer --help": 0.2,
+    "importer trivial import": 1.0,
+    "api import": 0.6,
+    "api first response": 1.0,
+    "bindings import": 0.1,
+}
+
+# One class, one runner: the time of an import of this file is almost all start-up and schema loading
+TRIVIAL_RESULT_LIST = """<?xml version="1.0" encoding="UTF-8"?>
+<ResultList xmlns="http://www.orienteering.org/datastandard/3.0" iofVersion="3.0"
+            createTime="2026-01-01T12:00:00.000" creator="benchmarks.startup" status="Complete">
+  <Event><Name>Startup</Name></Event>
+  <ClassResult>
+    <Class sex="M"><Name>H21</Name></Class>
+    <Course><Name>A</Name><NumberOfControls>1</NumberOfControls></Course>
+    <PersonResult>
+      <Person><Name><Family>Runner</Family><Given>Rita</Given></Name></Person>
+      <Result>
+        <Time>600</Time>
+        <Status>OK</Status>
+        <SplitTime><ControlCode>31</ControlCode><Time>300</Time></SplitTime>
+      </Result>
+    </PersonResult>
+  </ClassResult>
+</ResultList>
+"""
+
+
+def timed_runs(command: list[str], environment: dict, runs: int) -> list[float]:
+    durations = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, env=environment, check=True, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def first_response_runs(environment: dict, runs: int) -> list[float]:
+    """Time from starting uvicorn until the API answers its first request."""
+    durations = []
+    for _ in range(runs):
+        port = free_port()
+        started = time.perf_counter()
+        server = subprocess.Popen([sys.executable, "-m", "uvicorn", "sql_app.main:app", "--port", str(port),
+                                   "--log-level", "warning"], cwd=ROOT, env=environment)
+        try:
+            while True:
+                try:
+                    httpx.get(f"http://127.0.0.1:{port}/events/", timeout=1.0)
+                    break
+                except httpx.HTTPError:
+                    if server.poll() is not None:
+                        raise RuntimeError(f"uvicorn exited with status {server.returncode}")
+                    time.sleep(0.005)
+            durations.append(time.perf_counter() - started)
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+    return durations
+
+
+def import_times(command: list[str], environment: dict, top: int = 15) -> list[dict]:
+    """Modules imported directly by the command, by cumulative import time, from one -X importtime run."""
+    process = subprocess.run([command[0], "-X", "importtime"] + command[1:], cwd=ROOT, env=environment,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    modules = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        timing, cumulative_us, name = line.split("|")
+        self_us = timing.rsplit(":", 1)[1]
+        name = name[1:]
+        if name.startswith(" "):
+            continue  # imported by another module, included in that module's cumulative time
+        modules.append({"module": name, "self_ms": int(self_us) / 1000,
+                        "cumulative_ms": int(cumulative_us) / 1000})
+    return sorted(modules, key=lambda module: module["cumulative_ms"], reverse=True)[:top]
+
+
+def measure(runs: int) -> list[dict]:
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        environment = {**os.environ,
+                       "EVENT_PRESENTER_DATABASE_URL": f"sqlite:///{directory / 'startup.db'}",
+                       "PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")]))}
+        # Measure with cached bytecode, like an installed deployment; compiling the 18k lines of generated
+        # bindings alone takes over 0.1 s.
+        environment.pop("PYTHONDONTWRITEBYTECODE", None)
+        subprocess.run([sys.executable, "-m", "compileall", "-q", "models.py", "sql_app", "importer"], cwd=ROOT,
+                       env=environment, check=True)
+        subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=ROOT, env=environment, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        result_list = directory / "trivial.xml"
+        result_list.write_text(TRIVIAL_RESULT_LIST)
+
+        commands = {
+            "interpreter": [sys.executable, "-c", "pass"],
+            "importer --help": [sys.executable, "-m", "importer.main", "--help"],
+            "importer trivial import": [sys.executable, "-m", "importer.main", "init", str(result_list), "--schema",
+                                        str(ROOT / "importer" / "data" / "IOF.xsd")],
+            "api import": [sys.executable, "-c", "import sql_app.main"],
+            "bindings import": [sys.executable, "-c", "import models"],
+        }
+        results = []
+        for name, command in commands.items():
+            durations = timed_runs(command, environment, runs)
+            results.append({"name": name, "median_s": statistics.median(durations), "runs_s": durations,
+                            "target_s": TARGETS[name], "imports": import_times(command, environment)})
+        durations = first_response_runs(environment, runs)
+        results.append({"name": "api first response", "median_s": statistics.median(durations), "runs_s": durations,
+                        "target_s": TARGETS["api first response"], "imports": []})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", type=Path, default=Path("startup.json"))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--check", action="store_true")
+    arguments = parser.parse_args()
+
+    results = measure(arguments.runs)
+    arguments.output.write_text(json.dumps({
+        "python": platform.python_version(),
+        "machine": {"platform": platform.platform(), "cpus": os.cpu_count()},
+        "results": results,
+    }, indent=2))
+
+    slow = []
+    for result in results:
+        over = result["median_s"] > result["target_s"]
+        print(f"{result['name']:<25} {result['median_s']:>7.3f} s  target {result['target_s']:.2f} s"
+              f"{'  SLOWER THAN TARGET' if over else ''}")
+        if over:
+            slow.append(result["name"])
+    if arguments.check and slow:
+        sys.exit(1)
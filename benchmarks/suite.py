@@ -0,0 +1,140 @@
+"""Load-test the API against a generated fixture database and write the results to JSON.
+
+Creates a fixture database (see benchmarks.fixture) in a temporary directory, starts uvicorn on it and drives every
+endpoint at increasing concurrency::
+
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --output after.json --baseline bench.json
+
+With --baseline the throughput and p95 latency of every endpoint and level are compared to an earlier run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from .fixture import ROOT
+from .load_test import run_level
+
+# Result list 1 and event 1 are the fixture's; class 1 is its first class
+PATHS = [
+    "/events/",
+    "/result_lists/",
+    "/result_lists/1/classes/1",
+    "/result_lists/1/classes/1/splits",
+    "/presenter/1/pages",
+]
+LEVELS = [1, 8, 32, 128]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def wait_until_up(base_url: str, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {process.returncode}")
+        try:
+            httpx.get(f"{base_url}/events/", timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"uvicorn did not answer within {timeout} s")
+
+
+async def drive(base_url: str, paths: list[str], levels: list[int], duration: float) -> list[dict]:
+    results = []
+    for path in paths:
+        for concurrency in levels:
+            result = {"path": path, **await run_level(base_url, path, concurrency, duration)}
+            print(f"{path:<40} {result['concurrency']:>5} {result['throughput']:>9.1f} req/s "
+                  f"p50 {result['p50_ms']:>7.1f} p95 {result['p95_ms']:>7.1f} p99 {result['p99_ms']:>7.1f} ms "
+                  f"errors {result['error_rate']:.1%}", flush=True)
+            results.append(result)
+    return results
+
+
+def compare(results: list[dict], baseline: list[dict]):
+    before = {(result["path"], result["concurrency"]): result for result in baseline}
+    print(f"\n{'path':<40} {'level':>5} {'req/s':>9} {'p95 ms':>9}")
+    for result in results:
+        old = before.get((result["path"], result["concurrency"]))
+        if old is None:
+            continue
+        throughput = result["throughput"] / old["throughput"] - 1 if old["throughput"] else float("nan")
+        p95 = result["p95_ms"] / old["p95_ms"] - 1 if old["p95_ms"] else float("nan")
+        print(f"{result['path']:<40} {result['concurrency']:>5} {throughput:>+9.1%} {p95:>+9.1%}")
+
+
+def run_suite(paths: list[str], levels: list[int], duration: float, classes: int, runners: int, controls: int,
+              workers: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        environment = {**os.environ,
+                       "EVENT_PRESENTER_DATABASE_URL": f"sqlite:///{Path(directory) / 'fixture.db'}",
+                       "PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")]))}
+        subprocess.run([sys.executable, "-m", "benchmarks.fixture", "--classes", str(classes), "--runners",
+                        str(runners), "--controls", str(controls)], cwd=ROOT, env=environment, check=True)
+
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = subprocess.Popen([sys.executable, "-m", "uvicorn", "sql_app.main:app", "--port", str(port),
+                                   "--workers", str(workers), "--log-level", "warning"], cwd=ROOT, env=environment)
+        try:
+            wait_until_up(base_url, server)
+            results = asyncio.run(drive(base_url, paths, levels, duration))
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+    return {
+        "revision": git_revision(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "machine": {"platform": platform.platform(), "cpus": os.cpu_count()},
+        "fixture": {"classes": classes, "runners": runners, "controls": controls},
+        "server": {"workers": workers},
+        "duration": duration,
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", type=Path, default=Path("bench.json"))
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--paths", nargs="+", default=PATHS)
+    parser.add_argument("--levels", type=int, nargs="+", default=LEVELS)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--classes", type=int, default=40)
+    parser.add_argument("--runners", type=int, default=60)
+    parser.add_argument("--controls", type=int, default=15)
+    parser.add_argument("--workers", type=int, default=1)
+    arguments = parser.parse_args()
+
+    report = run_suite(arguments.paths, arguments.levels, arguments.duration, arguments.classes, arguments.runners,
+                       arguments.controls, arguments.workers)
+    arguments.output.write_text(json.dumps(report, indent=2))
+    print(f"\nWrote {arguments.output}")
+    if arguments.baseline:
+        compare(report["results"], json.loads(arguments.baseline.read_text())["results"])
@@ -0,0 +1,63 @@
+"""The XML export writes rows that were not written by the importer, like split times without a status::
+
+    python -m unittest benchmarks.test_export
+"""
+import datetime
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from sql_app.export import write_result_list_xml
+from sql_app.models import Base, Event, ResultList, EventClass, ClassResult, Person, PersonResult, PersonRaceResult, \
+    SplitTime, ResultStatus, SplitTimeStatusType
+
+
+class ExportTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        engine = create_engine(f"sqlite:///{Path(directory.name) / 'export.db'}")
+        self.addCleanup(engine.dispose)
+        Base.metadata.create_all(engine)
+        self.db = Session(engine)
+        self.addCleanup(self.db.close)
+
+    def export(self) -> str:
+        out = io.BytesIO()
+        self.assertTrue(write_result_list_xml(self.db, 1, out))
+        return out.getvalue().decode()
+
+    def add_race_result(self, status, split_statuses):
+        event = Event(name="Winter-OL")
+        result_list = ResultList(event_id=1, creator="test", create_time=datetime.datetime(2026, 1, 1, 12))
+        event_class = EventClass(name="H21", result_list=1)
+        class_result = ClassResult(event_class_id=1, result_list_id=1, time_resolution=1.0)
+        person_result = PersonResult(class_result_id=1, person_id=1)
+        race_result = PersonRaceResult(person_result_id=1, race_number=1, time=1141.0, status=status)
+        split_times = [SplitTime(result_id=1, control_code=str(31 + number), time=60.0 * (number + 1),
+                                 status=split_status) for number, split_status in enumerate(split_statuses)]
+        self.db.add_all([event, result_list, event_class, class_result, Person(family_name="Graumann"),
+                         person_result, race_result, *split_times])
+        self.db.commit()
+
+    def test_split_time_without_status(self):
+        self.add_race_result(ResultStatus.OK, [None, SplitTimeStatusType.MISSING])
+        document = self.export()
+        self.assertIn("<SplitTime>\n          <ControlCode>31</ControlCode>\n          <Time>60</Time>", document)
+        self.assertIn('<SplitTime status="Missing">', document)
+        self.assertTrue(document.rstrip().endswith("</ResultList>"))
+
+    def test_race_result_without_status(self):
+        self.add_race_result(None, [SplitTimeStatusType.OK])
+        document = self.export()
+        self.assertNotIn("<Status>", document)
+        self.assertIn("<Time>1141</Time>", document)
+        self.assertTrue(document.rstrip().endswith("</ResultList>"))
+
+
+if __name__ == "__main__":
+    unittest.main()
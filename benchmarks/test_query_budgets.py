@@ -0,0 +1,49 @@
+"""The API endpoints and crud functions stay within their query budgets on a fixture database::
+
+    python -m unittest benchmarks.test_query_budgets
+
+The fixture database is set up before `sql_app` is first imported, so run this test in its own interpreter or
+before anything else imports `sql_app`.
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from .fixture import create_fixture
+from .query_budgets import check_endpoints, check_crud
+
+CLASSES = 2
+RUNNERS = 30
+directory = tempfile.TemporaryDirectory()
+
+
+def setUpModule():
+    if "sql_app.database" in sys.modules:
+        raise unittest.SkipTest("sql_app was imported before the fixture database was set up")
+    # before the first import of sql_app, which creates the engines
+    os.environ["EVENT_PRESENTER_DATABASE_URL"] = f"sqlite:///{Path(directory.name) / 'fixture.db'}"
+    create_fixture(CLASSES, RUNNERS, controls=15)
+
+
+def tearDownModule():
+    directory.cleanup()
+
+
+class QueryBudgetsTest(unittest.TestCase):
+    def test_endpoints(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            problems = check_endpoints(RUNNERS)
+        self.assertEqual(problems, [], "\n\n".join(problems))
+
+    def test_crud(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            problems = check_crud(RUNNERS)
+        self.assertEqual(problems, [], "\n\n".join(problems))
+
+
+if __name__ == "__main__":
+    unittest.main()
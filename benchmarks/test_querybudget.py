@@ -0,0 +1,70 @@
+"""Query budgets fail a route that runs one query more than its budget, or repeats a statement too often::
+
+    python -m unittest benchmarks.test_querybudget
+"""
+import unittest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from .querybudget import query_budget, fingerprint, QueryBudgetExceeded, REPEAT_LIMIT
+
+engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+app = FastAPI()
+
+
+@app.get("/classes/{class_id}")
+def read_class(class_id: int):
+    with engine.connect() as connection:
+        name = connection.execute(text("SELECT name FROM classes WHERE id = :id"), dict(id=class_id)).scalar()
+        runners = connection.execute(text("SELECT id FROM runners WHERE class = :id"), dict(id=class_id)).scalars()
+        return {"name": name, "runners": list(runners)}
+
+
+@app.get("/classes/{class_id}/runners")
+def read_runners(class_id: int):
+    with engine.connect() as connection:
+        runner_ids = connection.execute(text("SELECT id FROM runners WHERE class = :id"), dict(id=class_id))
+        # one query per runner
+        return [connection.execute(text("SELECT name FROM runners WHERE id = :id"), dict(id=runner_id)).scalar()
+                for runner_id, in runner_ids.all()]
+
+
+def setUpModule():
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE classes (id INTEGER PRIMARY KEY, name TEXT)"))
+        connection.execute(text("CREATE TABLE runners (id INTEGER PRIMARY KEY, class INTEGER, name TEXT)"))
+        connection.execute(text("INSERT INTO classes VALUES (1, 'H21')"))
+        connection.execute(text("INSERT INTO runners (class, name) VALUES (1, :name)"),
+                           [dict(name=f"Runner {runner}") for runner in range(REPEAT_LIMIT + 1)])
+
+
+class QueryBudgetTest(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+
+    def test_route_within_budget(self):
+        with query_budget(2, engine) as log:
+            response = self.client.get("/classes/1")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(log), 2)
+
+    def test_route_with_one_query_too_many(self):
+        with self.assertRaisesRegex(QueryBudgetExceeded, "ran 2 queries, budget is 1"):
+            with query_budget(1, engine, label="GET /classes/1"):
+                self.client.get("/classes/1")
+
+    def test_repeated_statement(self):
+        with self.assertRaisesRegex(QueryBudgetExceeded, rf"same statement {REPEAT_LIMIT + 1} times \(N\+1\?\)"):
+            with query_budget(100, engine):
+                self.client.get("/classes/1/runners")
+
+    def test_fingerprint(self):
+        self.assertEqual(fingerprint("SELECT * FROM runners WHERE id IN (?, ?, ?) AND name = 'O''Brien'  LIMIT 10"),
+                         "SELECT * FROM runners WHERE id IN (?+) AND name = ? LIMIT ?")
+
+
+if __name__ == "__main__":
+    unittest.main()
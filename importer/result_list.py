@@ -0,0 +1,202 @@
+"""Import of IOF XML ResultList documents, as decoded by xmlschema, into the database."""
+import time
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from sql_app.crud import find_or_create_event, \
+    find_or_create_result_list, \
+    find_or_create_event_class, \
+    find_or_create_course, \
+    find_or_create_class_result, \
+    find_or_create_organisation, \
+    find_or_create_person, \
+    replace_class_result, \
+    bump_result_list_version
+from sql_app.database import SessionLocal
+from isotime import parse_datetime, parse_datetimes, epoch_millis, MISSING
+from sql_app.durations import to_seconds
+from sql_app.metrics import IMPORTED, IMPORT_DURATION, REGISTRY
+from sql_app.models import Event, \
+    ResultList, \
+    ResultListStatusType, \
+    SexType, \
+    ResultListModeType, \
+    EventClassStatus, \
+    Course, \
+    ClassResult, \
+    ResultStatus, \
+    SplitTimeStatusType
+from sql_app.schemas import PersonResultCreate, PersonRaceResultCreate, SplitTimeCreate
+
+
+def import_event(data: dict, db: Session):
+    return find_or_create_event(db, data['Name'])
+
+
+def import_result_list(data: dict, db: Session):
+    started = time.perf_counter()
+    event: Event = import_event(data['Event'], db)
+    create_time = parse_datetime(data['@createTime'])
+    status = ResultListStatusType.get_enum_value(data['@status'])
+    result_list: ResultList = find_or_create_result_list(
+        db=db, event=event,
+        status=status,
+        creator=data['@creator'],
+        create_time=create_time)
+    if import_class_results(data['ClassResult'], event, result_list, db):
+        bump_result_list_version(db, result_list.id)
+    IMPORTED.inc(("result_lists",))
+    IMPORT_DURATION.inc(amount=time.perf_counter() - started)
+
+
+def import_dict(data: dict):
+    import_result_list(data, SessionLocal())
+
+
+def import_class_results(data: dict, event: Event, result_list: ResultList, db: Session) -> bool:
+    """Import all class results; returns whether any of them changed."""
+    # print(json.dumps(data, indent=2))
+    changed = [import_class_result(class_result, event, result_list, db) for class_result in data]
+    return any(changed)
+
+
+def import_event_class(data: dict, db: Session, result_list_id: int):
+    return find_or_create_event_class(db=db,
+                                      result_list_id=result_list_id,
+                                      name=data['Name'],
+                                      short_name=data.get('ShortName', None),
+                                      result_list_mode=ResultListModeType.get_enum_value(data['@resultListMode']) if
+                                      '@resultListMode' in data else ResultListModeType.DEFAULT,
+                                      sex=SexType.get_enum_value(data['@sex']) if '@sex' in data else None,
+                                      status=EventClassStatus.get_enum_value(data['@status']) if '@status' in data
+                                      else EventClassStatus.NORMAL,
+                                      min_number_of_team_members=data[
+                                          '@minNumberOfTeamMembers'] if '@minNumberOfTeamMembers' in data else None,
+                                      max_number_of_team_members=data[
+                                          '@maxNumberOfTeamMembers'] if '@maxNumberOfTeamMembers' in data else None
+                                      )
+
+
+def import_courses(courses_dict: dict, db: Session, result_list_id: int, event_class_id: int):
+    courses = []
+    for data in courses_dict:
+        db_course: Optional[Course] = find_or_create_course(db=db,
+                                                            result_list_id=result_list_id,
+                                                            event_class_id=event_class_id,
+                                                            race_number=data[
+                                                                '@raceNumber'] if '@raceNumber' in data else 1,
+                                                            number_of_controls=data[
+                                                                'NumberOfControls'] if 'NumberOfControls' in data
+                                                            else None,
+                                                            name=data['Name'] if 'Name' in data else None,
+                                                            course_id=data['Id'] if 'Id' in data else None,
+                                                            course_family=data[
+                                                                'CourseFamily'] if 'CourseFamily' in data else None,
+                                                            length=data['Length'] if 'Lenght' in data else None,
+                                                            climb=data['Climb'] if 'Climb' in data else None
+                                                            )
+        courses.append(db_course)
+
+    return courses
+
+
+def import_organisation(data: dict, db: Session):
+    return find_or_create_organisation(db, name=data['Name'], short_name=data.get('ShortName', None))
+
+
+def import_person(data: dict, db: Session):
+    name = data.get('Name', {})
+    return find_or_create_person(db,
+                                 family_name=name.get('Family', None),
+                                 given_name=name.get('Given', None),
+                                 sex=SexType.get_enum_value(data['@sex']) if '@sex' in data else None,
+                                 birth_date=data.get('BirthDate', None))
+
+
+def import_split_times(data: list) -> list[SplitTimeCreate]:
+    return [SplitTimeCreate(control_code=split_time.get('ControlCode', None),
+                            status=SplitTimeStatusType.get_enum_value(split_time['@status']) if
+                            '@status' in split_time else SplitTimeStatusType.OK,
+                            time=split_time.get('Time', None))
+            for split_time in data]
+
+
+def import_race_results(data: list) -> list[PersonRaceResultCreate]:
+    return [PersonRaceResultCreate(race_number=result.get('@raceNumber', 1),
+                                   bib_number=result.get('BibNumber', None),
+                                   start_time=result.get('StartTime', None),
+                                   finish_time=result.get('FinishTime', None),
+                                   time=result.get('Time', None),
+                                   time_behind=result.get('TimeBehind', None),
+                                   position=result.get('Position', None),
+                                   status=ResultStatus.get_enum_value(result['Status']),
+                                   control_card=result['ControlCard'][0] if result.get('ControlCard') else None,
+                                   split_times=import_split_times(result.get('SplitTime', [])))
+            for result in data]
+
+
+def parse_result_times(person_results: list):
+    """Parse the start and finish times of all results of a class, one column at a time.
+
+    A result without a Time gets the difference of its finish and start time, if it has both.
+    """
+    results = [result for person_result in person_results for result in person_result.get('Result', [])]
+    untimed = [result for result in results if result.get('Time') is None
+               and result.get('StartTime') is not None and result.get('FinishTime') is not None]
+    if untimed:
+        starts, finishes = (epoch_millis([result[key] for result in untimed]) for key in ('StartTime', 'FinishTime'))
+        for result, start, finish in zip(untimed, starts.tolist(), finishes.tolist()):
+            if MISSING not in (start, finish):
+                result['Time'] = to_seconds(finish - start)
+    for key in ('StartTime', 'FinishTime'):
+        for result, value in zip(results, parse_datetimes([result.get(key) for result in results])):
+            if value is not None:
+                result[key] = value
+
+
+def import_person_race_results(
+        data: dict,
+        class_result: ClassResult,
+        courses,
+        db: Session) -> bool:
+    parse_result_times(data)
+    person_results = []
+    for person_result in data:
+        person = import_person(person_result['Person'], db)
+        organisation = import_organisation(person_result['Organisation'], db) if 'Organisation' in person_result \
+            else None
+        person_results.append(PersonResultCreate(person=person.id,
+                                                 organisation=organisation.id if organisation else None,
+                                                 race_results=import_race_results(person_result.get('Result', []))))
+    changed = replace_class_result(db, class_result.id, person_results)
+    race_results = [race_result for person_result in person_results for race_result in person_result.race_results]
+    IMPORTED.inc(("class_results",))
+    IMPORTED.inc(("person_results",), len(person_results))
+    IMPORTED.inc(("race_results",), len(race_results))
+    IMPORTED.inc(("split_times",), sum(len(race_result.split_times) for race_result in race_results))
+    return changed
+
+
+def import_class_result(data: dict, event: Event, result_list: ResultList, db: Session) -> bool:
+    event_class = import_event_class(data['Class'], db, result_list.id)
+    courses = import_courses(data['Course'], db, result_list.id, event_class.id)
+    class_result = find_or_create_class_result(db, result_list.id, event_class.id,
+                                               time_resolution=data.get('@timeResolution', 1.0))
+    return import_person_race_results(
+        data.get('PersonResult', []),
+        class_result,
+        courses,
+        db)
+
+
+def report_throughput(metrics_file: Optional[str]):
+    duration = sum(IMPORT_DURATION.values.values())
+    race_results = IMPORTED.values.get(("race_results",), 0)
+    split_times = IMPORTED.values.get(("split_times",), 0)
+    print(f"Imported {race_results} results and {split_times} split times in {duration:.2f} s "
+          f"({race_results / duration:.0f} results/s, {split_times / duration:.0f} split times/s)")
+    if metrics_file:
+        # e.g. for the textfile collector of the Prometheus node exporter
+        Path(metrics_file).write_text(REGISTRY.render())
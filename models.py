@@ -18,6 +18,12 @@
 # Current working directory (os.getcwd()):
 #   event_presenter
 #
+# Edited by hand after generation; a new generateDS run drops these changes, so redo them:
+#   - GeneratedsSuper.gds_parse_datetime calls isotime.parse_datetime (shared with the importer) instead of
+#     the generated strptime parser.
+#   - gds_validate_simple_patterns checks patterns compiled once by compile_pattern_ with fullmatch instead of
+#     re.search on the pattern strings.
+#
 
 import sys
 try:
@@ -32,6 +38,8 @@ import datetime as datetime_
 import decimal as decimal_
 from lxml import etree as etree_
 
+from isotime import parse_datetime
+
 
 Validate_simpletypes_ = True
 SaveElementTreeNode = True
@@ -161,6 +169,22 @@ try:
 except ModulenotfoundExp_ :
     Enum = object
 
+#
+# Simple type patterns, compiled once per pattern string.  The re module
+#   caches only a few hundred patterns, fewer than a large schema uses.
+#
+
+CompiledPatterns_ = {}
+
+
+def compile_pattern_(pattern):
+    if not isinstance(pattern, BaseStrType_):
+        return pattern
+    compiled = CompiledPatterns_.get(pattern)
+    if compiled is None:
+        compiled = CompiledPatterns_[pattern] = re_.compile(pattern)
+    return compiled
+
 #
 # The root super-class for element type classes
 #
@@ -421,32 +445,8 @@ except ModulenotfoundExp_ as exp:
             return _svalue
         @classmethod
         def gds_parse_datetime(cls, input_data):
-            tz = None
-            if input_data[-1] == 'Z':
-                tz = GeneratedsSuper._FixedOffsetTZ(0, 'UTC')
-                input_data = input_data[:-1]
-            else:
-                results = GeneratedsSuper.tzoff_pattern.search(input_data)
-                if results is not None:
-                    tzoff_parts = results.group(2).split(':')
-                    tzoff = int(tzoff_parts[0]) * 60 + int(tzoff_parts[1])
-                    if results.group(1) == '-':
-                        tzoff *= -1
-                    tz = GeneratedsSuper._FixedOffsetTZ(
-                        tzoff, results.group(0))
-                    input_data = input_data[:-6]
-            time_parts = input_data.split('.')
-            if len(time_parts) > 1:
-                micro_seconds = int(float('0.' + time_parts[1]) * 1000000)
-                input_data = '%s.%s' % (
-                    time_parts[0], "{}".format(micro_seconds).rjust(6, "0"), )
-                dt = datetime_.datetime.strptime(
-                    input_data, '%Y-%m-%dT%H:%M:%S.%f')
-            else:
-                dt = datetime_.datetime.strptime(
-                    input_data, '%Y-%m-%dT%H:%M:%S')
-            dt = dt.replace(tzinfo=tz)
-            return dt
+            # Edited by hand: shared with the importer, see isotime.
+            return parse_datetime(input_data)
         def gds_validate_date(self, input_data, node=None, input_name=''):
             return input_data
         def gds_format_date(self, input_data, input_name=''):
@@ -529,14 +529,14 @@ except ModulenotfoundExp_ as exp:
         def gds_validate_simple_patterns(self, patterns, target):
             # pat is a list of lists of strings/patterns.
             # The target value must match at least one of the patterns
-            # in order for the test to succeed.
+            # in order for the test to succeed.  XSD patterns always
+            # apply to the whole value.
             found1 = True
             target = str(target)
             for patterns1 in patterns:
                 found2 = False
                 for patterns2 in patterns1:
-                    mo = re_.search(patterns2, target)
-                    if mo is not None and len(mo.group(0)) == len(target):
+                    if compile_pattern_(patterns2).fullmatch(target) is not None:
                         found2 = True
                         break
                 if not found2:
@@ -0,0 +1,193 @@
+"""Compact variant of the generateDS bindings in `models`.
+
+Every element class of `models` gets a twin here with `__slots__` for its data fields and no per-object
+bookkeeping: the lxml node, original tag name, parent object, namespace prefixes (also one per field) and the
+collector are not stored. The twins are derived from `models` when this module is imported, so bindings
+regenerated from the same schema get a matching compact variant without further changes::
+
+    import models_compact
+    result_list = models_compact.parse("results.xml", silence=True)
+
+iterparse() builds the same objects while the file is read and frees the lxml tree as it goes, for large files.
+
+The generated build, export and validation code is reused unchanged: it runs with this module's globals, so
+factories, super() calls and parse() resolve to the compact classes, and writes to the dropped attributes are
+discarded. Differences to `models`:
+
+- objects are not linked to their lxml nodes, so validation messages carry no line numbers
+- export writes the default namespace prefix and the tag names given by the parent element
+- the collector of validation messages is shared by all objects and is the one of the latest build
+"""
+import types
+
+import models as _generated
+
+# Attributes every generated object sets in __init__ that compact objects do not store
+BOOKKEEPING = ("gds_elementtree_node_", "original_tagname_", "parent_object_", "ns_prefix_")
+NSPREFIX_SUFFIX = "_nsprefix_"
+
+# Start from the generated module's namespace; element classes and functions are replaced below
+globals().update({name: value for name, value in vars(_generated).items() if not name.startswith("__")})
+SaveElementTreeNode = False
+
+
+class _Discarded:
+    """Data descriptor standing in for an attribute that is not stored: reads give None, writes are dropped."""
+    __slots__ = ()
+
+    def __get__(self, instance, owner=None):
+        return None if instance is not None else self
+
+    def __set__(self, instance, value):
+        pass
+
+
+class _Shared:
+    """Data descriptor for a value shared by all objects, i.e. the collector of the current build."""
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = None
+
+    def __get__(self, instance, owner=None):
+        return self.value if instance is not None else self
+
+    def __set__(self, instance, value):
+        self.value = value
+
+
+def _rebind(value):
+    """`value` with its functions running in this module's globals."""
+    if isinstance(value, types.FunctionType):
+        function = types.FunctionType(value.__code__, globals(), value.__name__, value.__defaults__,
+                                      value.__closure__)
+        function.__kwdefaults__ = value.__kwdefaults__
+        function.__qualname__ = value.__qualname__
+        function.__doc__ = value.__doc__
+        return function
+    if isinstance(value, staticmethod):
+        return staticmethod(_rebind(value.__func__))
+    if isinstance(value, classmethod):
+        return classmethod(_rebind(value.__func__))
+    return value
+
+
+def _attributes(cls) -> list[str]:
+    """Names of the attributes a generated object sets on construction, in order."""
+    return list(vars(cls()))
+
+
+def _compact_eq(self, other):
+    if type(self) != type(other):
+        return False
+    return all(getattr(self, name) == getattr(other, name) for name in type(self)._compact_fields)
+
+
+def _compact_base():
+    namespace = {}
+    for base in reversed(_generated.GeneratedsSuper.__mro__[:-1]):
+        namespace.update({name: _rebind(value) for name, value in vars(base).items()
+                          if name not in ("__dict__", "__weakref__")})
+    namespace.update({
+        "__slots__": (),
+        "__module__": __name__,
+        "__eq__": _compact_eq,
+        "_compact_fields": (),
+        "gds_collector_": _Shared(),
+        **{name: _Discarded() for name in BOOKKEEPING},
+    })
+    return type("GeneratedsSuper", (object,), namespace)
+
+
+def _compact_class(cls, compact_bases: tuple):
+    inherited = {name for base in compact_bases for name in getattr(base, "_compact_fields", ())}
+    attributes = _attributes(cls)
+    fields = [name for name in attributes
+              if name not in BOOKKEEPING and name != "gds_collector_" and not name.endswith(NSPREFIX_SUFFIX)]
+    namespace = {name: _rebind(value) for name, value in vars(cls).items()
+                 if name not in ("__dict__", "__weakref__")}
+    namespace.update({
+        "__slots__": tuple(name for name in fields if name not in inherited),
+        "__module__": __name__,
+        "_compact_fields": tuple(dict.fromkeys([*(name for base in compact_bases
+                                                   for name in getattr(base, "_compact_fields", ())), *fields])),
+        **{name: _Discarded() for name in attributes if name.endswith(NSPREFIX_SUFFIX)},
+    })
+    return type(cls.__name__, compact_bases, namespace)
+
+
+def _compact_classes() -> dict[type, type]:
+    """Compact twin of every element class of `models`, created base classes first."""
+    compact = {_generated.GeneratedsSuper: _compact_base()}
+    pending = [value for value in vars(_generated).values()
+               if isinstance(value, type) and issubclass(value, _generated.GeneratedsSuper)
+               and value is not _generated.GeneratedsSuper]
+    while pending:
+        cls = next(cls for cls in pending if all(base in compact for base in cls.__bases__))
+        compact[cls] = _compact_class(cls, tuple(compact[base] for base in cls.__bases__))
+        pending.remove(cls)
+    return compact
+
+
+_classes = _compact_classes()
+globals().update({cls.__name__: twin for cls, twin in _classes.items()})
+for _twin in _classes.values():
+    if isinstance(getattr(_twin, "superclass", None), type):
+        _twin.superclass = _classes.get(_twin.superclass, _twin.superclass)
+GDSClassesMapping = {tag: _classes.get(cls, cls) for tag, cls in _generated.GDSClassesMapping.items()}
+globals().update({name: _rebind(value) for name, value in vars(_generated).items()
+                  if isinstance(value, types.FunctionType) and value.__module__ == _generated.__name__})
+del _twin
+
+
+def iterparse(inFileName, silence=False, print_warnings=True):
+    """Like parse(), but builds the objects while the file is read instead of from the finished lxml tree.
+
+    Every child of the root element (e.g. a ClassResult of a ResultList) is built as soon as it has been read
+    and then removed from the tree, so the lxml tree of the whole document is never held: peak memory is the
+    object tree plus the largest child of the root element.
+    """
+    global CapturedNsmap_
+    gds_collector = GdsCollector_()
+    nsmap = {}
+    rootNode = rootObj = rootTag = None
+    for event, node in etree_.iterparse(inFileName, events=("start-ns", "end"), remove_comments=True,
+                                        remove_pis=True):
+        if event == "start-ns":
+            prefix, uri = node
+            if prefix:
+                nsmap[prefix] = uri
+            continue
+        if rootNode is None:
+            # the first end event is of the first leaf; its ancestors have been started with their attributes
+            rootNode = node
+            while rootNode.getparent() is not None:
+                rootNode = rootNode.getparent()
+            rootTag, rootClass = get_root_tag(rootNode)
+            if rootClass is None:
+                rootTag = 'BaseMessageElement'
+                rootClass = BaseMessageElement
+            rootObj = rootClass.factory()
+            rootObj.gds_collector_ = gds_collector
+            rootObj._buildAttributes(rootNode, rootNode.attrib, set())
+        if node.getparent() is rootNode:
+            nodeName_ = Tag_pattern_.match(node.tag).groups()[-1]
+            rootObj._buildChildren(node, rootNode, nodeName_, gds_collector_=gds_collector)
+            node.clear()  # before removing: lxml would otherwise walk the subtree to move it to a new document
+            rootNode.remove(node)
+    CapturedNsmap_ = nsmap
+    if not silence:
+        namespacedefs = ' '.join('xmlns:{}="{}"'.format(prefix, uri) for prefix, uri in nsmap.items())
+        sys.stdout.write('<?xml version="1.0" ?>\n')
+        rootObj.export(
+            sys.stdout, 0, name_=rootTag,
+            namespacedef_=namespacedefs,
+            pretty_print=True)
+    if print_warnings and len(gds_collector.get_messages()) > 0:
+        separator = ('-' * 50) + '\n'
+        sys.stderr.write(separator)
+        sys.stderr.write('----- Warnings -- count: {} -----\n'.format(
+            len(gds_collector.get_messages()), ))
+        gds_collector.write_messages(sys.stderr)
+        sys.stderr.write(separator)
+    return rootObj
@@ -0,0 +1,250 @@
+"""Split time analysis on runners x controls matrices.
+
+A class is loaded into a matrix of cumulative times, one row per race result and one column per course control
+plus the finish. All leg metrics are then computed column-wise with NumPy, so the cost grows with the size of the
+matrix and not with the number of Python objects.
+"""
+import warnings
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import select, type_coerce, SmallInteger, Integer
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import packed_splits
+from .durations import MILLISECONDS_PER_SECOND
+from .enum_codec import codes
+from .models import ClassResult, PersonResult, PersonRaceResult, Person, SplitTime, SplitTimeStatusType
+
+FINISH = "F"
+
+# Number of fastest runners per leg whose mean leg time is the reference for the time loss estimation
+REFERENCE_RUNNERS = 3
+
+# Stored codes of the split time statuses, which are loaded as an integer column
+SPLIT_OK, SPLIT_MISSING, SPLIT_ADDITIONAL = (codes(SplitTimeStatusType)[status] for status in (
+    SplitTimeStatusType.OK, SplitTimeStatusType.MISSING, SplitTimeStatusType.ADDITIONAL))
+
+
+def split_matrix(runner_ids: np.ndarray, split_runner_ids: np.ndarray, split_statuses: np.ndarray,
+                 split_times: np.ndarray, split_codes: np.ndarray, finish_times: np.ndarray):
+    """Arrange the course splits of a class into a matrix of cumulative times.
+
+    Split arrays hold one entry per split time, grouped by runner in punching order, with the statuses as their
+    stored codes (see enum_codec). ADDITIONAL punches are not part of the course and are dropped; MISSING punches
+    keep their column but have no time. The k-th course split of a runner goes into column k, the finish time into
+    the last column.
+
+    Returns the control codes of the columns and the (runners x columns) matrix, NaN where no time is known.
+    """
+    on_course = split_statuses != SPLIT_ADDITIONAL
+    split_runner_ids = split_runner_ids[on_course]
+    split_times = np.where(split_statuses[on_course] == SPLIT_MISSING, np.nan,
+                           split_times[on_course])
+    split_codes = split_codes[on_course]
+
+    rows = np.searchsorted(runner_ids, split_runner_ids)
+    # position of every split within its runner's group: running index minus the index where the group starts
+    group_starts = np.flatnonzero(np.r_[True, split_runner_ids[1:] != split_runner_ids[:-1]])
+    group_sizes = np.diff(np.r_[group_starts, len(split_runner_ids)])
+    columns = np.arange(len(split_runner_ids)) - np.repeat(group_starts, group_sizes)
+
+    number_of_controls = int(columns.max()) + 1 if len(columns) else 0
+    cumulative = np.full((len(runner_ids), number_of_controls + 1), np.nan)
+    cumulative[rows, columns] = split_times
+    cumulative[:, -1] = finish_times
+
+    _, first_split = np.unique(columns, return_index=True)
+    codes = [str(code) for code in split_codes[first_split]] + [FINISH]
+    return codes, cumulative
+
+
+def rank_columns(values: np.ndarray) -> np.ndarray:
+    """Competition ranks (1, 2, 2, 4, ...) of every column; 0 where the value is NaN."""
+    order = np.argsort(values, axis=0, kind="stable")  # NaN sorts last
+    ordered = np.take_along_axis(values, order, axis=0)
+    positions = np.arange(values.shape[0])[:, np.newaxis]
+    starts_run = np.ones(ordered.shape, dtype=bool)
+    starts_run[1:] = ordered[1:] != ordered[:-1]
+    ordered_ranks = np.maximum.accumulate(np.where(starts_run, positions, 0), axis=0) + 1
+    ranks = np.empty_like(ordered_ranks)
+    np.put_along_axis(ranks, order, ordered_ranks, axis=0)
+    return np.where(np.isnan(values), 0, ranks)
+
+
+def column_minimum(values: np.ndarray) -> np.ndarray:
+    """Minimum of every column ignoring NaN; NaN for columns without any value."""
+    minimum = np.where(np.isnan(values), np.inf, values).min(axis=0, initial=np.inf)
+    return np.where(np.isinf(minimum), np.nan, minimum)
+
+
+def leg_metrics(cumulative: np.ndarray) -> dict[str, np.ndarray]:
+    """Leg times, leg ranks and time behind the leg winner, plus the same for the cumulative times.
+
+    A leg next to a missing punch has no time and no rank.
+    """
+    legs = np.diff(cumulative, axis=1, prepend=0.0)
+    return {
+        "time": cumulative,
+        "rank": rank_columns(cumulative),
+        "behind": cumulative - column_minimum(cumulative),
+        "leg_time": legs,
+        "leg_rank": rank_columns(legs),
+        "leg_behind": legs - column_minimum(legs),
+    }
+
+
+def time_losses(legs: np.ndarray, reference_runners: int = REFERENCE_RUNNERS) -> dict[str, np.ndarray]:
+    """Estimate the time every runner lost on every leg.
+
+    Each leg gets a reference time, the mean of its `reference_runners` fastest leg times. A runner's
+    performance index is the median ratio of their leg times to the reference times, i.e. how fast they were on a
+    typical leg. The expected leg time is the reference time scaled by the performance index; whatever a runner
+    needed beyond that is counted as time lost. Legs without a time have no estimate.
+    """
+    fastest = np.sort(legs, axis=0)[:reference_runners]  # NaN sorts last
+    known = ~np.isnan(fastest)
+    reference = np.where(known, fastest, 0.0).sum(axis=0) / np.maximum(known.sum(axis=0), 1)
+    reference = np.where(known.any(axis=0), reference, np.nan)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # runners or legs without any time
+        performance_index = np.nanmedian(legs / reference, axis=1)
+    expected = reference * performance_index[:, np.newaxis]
+    loss = np.clip(legs - expected, 0.0, None)
+    return {
+        "reference": reference,
+        "performance_index": performance_index,
+        "expected": expected,
+        "time_loss": loss,
+        "total_time_loss": np.where(np.isnan(loss).all(axis=1), np.nan,
+                                    np.where(np.isnan(loss), 0.0, loss).sum(axis=1)),
+    }
+
+
+async def load_class_splits(db: AsyncSession, result_list_id: int, event_class_id: int, race_number: int = 1):
+    """Load the race results and split times of a class with at most three queries.
+
+    The split times are returned as columns: race result ids, status codes, times in seconds and control codes.
+    Packed split times are decoded from the race result rows; split_times is only queried for the race results
+    without.
+    """
+    class_result_id = (await db.execute(
+        select(ClassResult.id).where(ClassResult.result_list_id == result_list_id,
+                                     ClassResult.event_class_id == event_class_id))).scalar()
+    if class_result_id is None:
+        return None
+    runners = (await db.execute(
+        select(PersonRaceResult.id, PersonRaceResult.person_result_id, Person.family_name, Person.given_name,
+               PersonRaceResult.status, PersonRaceResult.position, PersonRaceResult.time,
+               PersonRaceResult.packed_splits)
+        .join(PersonResult, PersonRaceResult.person_result_id == PersonResult.id)
+        .outerjoin(Person, PersonResult.person_id == Person.id)
+        .where(PersonResult.class_result_id == class_result_id, PersonRaceResult.race_number == race_number)
+        .order_by(PersonRaceResult.id))).all()
+    columns = [_packed_split_columns(runners)]
+    if any(runner[7] is None for runner in runners):
+        splits = (await db.execute(
+            select(SplitTime.result_id, type_coerce(SplitTime.status, SmallInteger),
+                   type_coerce(SplitTime.time, Integer), SplitTime.control_code)
+            .join(PersonRaceResult, SplitTime.result_id == PersonRaceResult.id)
+            .join(PersonResult, PersonRaceResult.person_result_id == PersonResult.id)
+            .where(PersonResult.class_result_id == class_result_id, PersonRaceResult.race_number == race_number,
+                   PersonRaceResult.packed_splits.is_(None))
+            .order_by(SplitTime.result_id, SplitTime.id))).all()
+        columns.append((_column(splits, 0, np.int64),
+                        np.array([status or SPLIT_OK for _, status, _, _ in splits], dtype=np.uint8),
+                        _column(splits, 2, float) / MILLISECONDS_PER_SECOND,  # None becomes NaN
+                        _column(splits, 3, object)))
+    return runners, tuple(np.concatenate(column) for column in zip(*columns))
+
+
+def _packed_split_columns(runners) -> tuple[np.ndarray, ...]:
+    """Split time columns of the runners with packed split times."""
+    race_result_ids, unpacked = [], []
+    for runner in runners:
+        if runner[7] is not None:
+            race_result_ids.append(runner[0])
+            unpacked.append(packed_splits.unpack_arrays(runner[7]))
+    times = np.concatenate([splits.times for splits in unpacked] or [np.empty(0, np.int32)])
+    return (np.repeat(np.array(race_result_ids, dtype=np.int64), [len(splits.times) for splits in unpacked]),
+            np.concatenate([splits.statuses for splits in unpacked] or [np.empty(0, np.uint8)]),
+            np.where(times == packed_splits.MISSING, np.nan, times / MILLISECONDS_PER_SECOND),
+            np.array([code for splits in unpacked for code in splits.control_codes], dtype=object))
+
+
+def _column(rows, index: int, dtype=None) -> np.ndarray:
+    return np.array([row[index] for row in rows], dtype=dtype)
+
+
+def _nullable(values: np.ndarray, missing: np.ndarray) -> list:
+    values = values.astype(object)
+    values[missing] = None
+    return values.tolist()
+
+
+async def class_matrix(db: AsyncSession, result_list_id: int, event_class_id: int, race_number: int = 1):
+    """Runners, column control codes and cumulative time matrix of a class, or None if there is no such class."""
+    loaded = await load_class_splits(db, result_list_id, event_class_id, race_number)
+    if loaded is None:
+        return None
+    runners, (split_runner_ids, split_statuses, split_times, split_codes) = loaded
+    codes, cumulative = split_matrix(_column(runners, 0, np.int64), split_runner_ids, split_statuses, split_times,
+                                     split_codes, _column(runners, 6, float))
+    return runners, codes, cumulative
+
+
+def _runner_documents(runners, fields: tuple[str, ...], columns: list[list], **per_runner: list) -> list[dict]:
+    return [{
+        "race_result_id": race_result_id,
+        "person_result_id": person_result_id,
+        "family_name": family_name,
+        "given_name": given_name,
+        "status": status,
+        "position": position,
+        **{name: values[row] for name, values in per_runner.items()},
+        "splits": [dict(zip(fields, split)) for split in zip(*(column[row] for column in columns))]
+    } for row, (race_result_id, person_result_id, family_name, given_name, status, position, *_)
+        in enumerate(runners)]
+
+
+async def class_splits(db: AsyncSession, result_list_id: int, event_class_id: int,
+                       race_number: int = 1) -> Optional[dict]:
+    """Leg analysis of a class as a document matching schemas.ClassSplits."""
+    loaded = await class_matrix(db, result_list_id, event_class_id, race_number)
+    if loaded is None:
+        return None
+    runners, codes, cumulative = loaded
+    metrics = leg_metrics(cumulative)
+    columns = [_nullable(metric, metric == 0) if field.endswith("rank") else _nullable(metric, np.isnan(metric))
+               for field, metric in metrics.items()]
+    return {
+        "result_list_id": result_list_id,
+        "event_class_id": event_class_id,
+        "race_number": race_number,
+        "controls": codes,
+        "runners": _runner_documents(runners, tuple(metrics), columns),
+    }
+
+
+async def class_time_losses(db: AsyncSession, result_list_id: int, event_class_id: int,
+                            race_number: int = 1) -> Optional[dict]:
+    """Time loss estimation of a class as a document matching schemas.ClassTimeLosses."""
+    loaded = await class_matrix(db, result_list_id, event_class_id, race_number)
+    if loaded is None:
+        return None
+    runners, codes, cumulative = loaded
+    legs = np.diff(cumulative, axis=1, prepend=0.0)
+    losses = time_losses(legs)
+    fields = ("leg_time", "expected", "time_loss")
+    columns = [_nullable(values, np.isnan(values)) for values in (legs, losses["expected"], losses["time_loss"])]
+    return {
+        "result_list_id": result_list_id,
+        "event_class_id": event_class_id,
+        "race_number": race_number,
+        "controls": codes,
+        "reference": _nullable(losses["reference"], np.isnan(losses["reference"])),
+        "runners": _runner_documents(
+            runners, fields, columns,
+            performance_index=_nullable(losses["performance_index"], np.isnan(losses["performance_index"])),
+            total_time_loss=_nullable(losses["total_time_loss"], np.isnan(losses["total_time_loss"]))),
+    }
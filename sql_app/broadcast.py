@@ -0,0 +1,96 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Optional, Iterable
+
+from .versions import VersionRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """A single client listening for changes of one event, optionally restricted to some event classes."""
+
+    def __init__(self, event_id: int, event_classes: Optional[Iterable[int]] = None, max_pending: int = 64):
+        self.event_id = event_id
+        self.event_classes = frozenset(event_classes) if event_classes else None
+        self.queue: asyncio.Queue[bytes] = asyncio.Queue(max_pending)
+
+    def wants(self, event_class_id: int) -> bool:
+        return self.event_classes is None or event_class_id in self.event_classes
+
+    def deliver(self, message: bytes):
+        # A client that does not keep up loses its oldest pending message instead of blocking everybody else.
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+
+class BroadcastHub:
+    """Fans out change messages to all subscriptions of an event.
+
+    Messages are encoded once per change and the same bytes are queued for every matching subscription, so
+    publishing costs one dictionary lookup plus one queue put per subscriber and never touches the database.
+    """
+
+    def __init__(self):
+        self._subscriptions: dict[int, set[Subscription]] = defaultdict(set)
+
+    def __len__(self):
+        return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+    def subscribe(self, event_id: int, event_classes: Optional[Iterable[int]] = None) -> Subscription:
+        subscription = Subscription(event_id, event_classes)
+        self._subscriptions[event_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self._subscriptions.get(subscription.event_id)
+        if subscriptions is None:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.event_id]
+
+    def publish(self, event_id: int, result_list_id: int, event_class_id: int, version: int):
+        subscriptions = self._subscriptions.get(event_id)
+        if not subscriptions:
+            return
+        message = encode_change(event_id, result_list_id, event_class_id, version)
+        for subscription in subscriptions:
+            if subscription.wants(event_class_id):
+                subscription.deliver(message)
+
+
+def encode_change(event_id: int, result_list_id: int, event_class_id: int, version: int) -> bytes:
+    data = json.dumps({"event": event_id, "result_list": result_list_id, "event_class": event_class_id,
+                       "version": version}, separators=(",", ":"))
+    return f"event: change\ndata: {data}\n\n".encode()
+
+
+async def watch_versions(registry: VersionRegistry, hub: BroadcastHub, interval: float = 1.0):
+    """Publish a change message for every class result whose version changed since the previous poll.
+
+    The importer runs in its own process, so changes are detected by reloading the version registry: one
+    snapshot per interval for all subscribers, and none at all while nobody is subscribed.
+    """
+    previous: Optional[dict[tuple[int, int], int]] = None
+    while True:
+        await asyncio.sleep(interval)
+        if not len(hub):
+            previous = None
+            continue
+        try:
+            await registry.refresh(force=True)
+        except Exception:
+            logger.exception("Reloading result versions failed")
+            continue
+        current = registry.class_results()
+        if previous is not None:
+            for (result_list_id, event_class_id), version in current.items():
+                if previous.get((result_list_id, event_class_id)) != version:
+                    event_id = registry.event_of_result_list(result_list_id)
+                    if event_id is not None:
+                        hub.publish(event_id, result_list_id, event_class_id, version)
+        previous = current
@@ -0,0 +1,59 @@
+"""Content negotiation for precompressed response bodies.
+
+Compressed bodies are stored next to the plain body in the response cache, so each version of a response is
+compressed at most once per encoding. brotli is optional; without it only gzip is offered.
+"""
+import gzip
+from typing import Optional
+
+try:
+    import brotli
+except ModuleNotFoundError:
+    brotli = None
+
+# Bodies smaller than this are sent as they are: compression would save less than it costs
+MIN_SIZE = 1024
+
+GZIP_LEVEL = 9
+# 10 and 11 are an order of magnitude slower and gain next to nothing on JSON standings
+BROTLI_QUALITY = 9
+
+# Supported encodings, preferred first
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """The supported encoding the client accepts with the highest quality value, or None for identity."""
+    if not accept_encoding:
+        return None
+    qualities = {}
+    for coding in accept_encoding.split(","):
+        name, _, parameters = coding.strip().partition(";")
+        quality = 1.0
+        parameter, _, value = parameters.strip().partition("=")
+        if parameter.strip() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        qualities[name.strip().lower()] = quality
+    accepted = [(qualities.get(encoding, qualities.get("*", 0.0)), -rank) for rank, encoding in enumerate(ENCODINGS)]
+    quality, rank = max(accepted)
+    return ENCODINGS[-rank] if quality > 0 else None
+
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    """Strong entity tag of the representation of `etag` in `encoding`; each encoding needs its own tag."""
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+
+def representation_etags(etag: str) -> list[str]:
+    return [etag] + [encoded_etag(etag, encoding) for encoding in ENCODINGS]
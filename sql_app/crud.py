@@ -1,12 +1,34 @@
 import datetime
+import hashlib
+from collections import defaultdict, deque
 from typing import Optional
 
+from sqlalchemy import select, insert, update, delete, func, case, and_
 from sqlalchemy.orm import Session
 
-from . import models, schemas
+from . import models, schemas, packed_splits
 from .models import Event, ResultList, Course, ResultListStatusType, EventClass, SexType, ResultListModeType, \
-    EventClassStatus
-from .schemas import EventCreate, ResultListCreate, EventClassCreate, CourseCreate
+    EventClassStatus, ClassResult, PersonResult, PersonRaceResult, Organisation, Person, SplitTime, ResultStatus
+from .schemas import EventCreate, ResultListCreate, EventClassCreate, CourseCreate, OrganisationCreate, PersonCreate, \
+    ClassResultCreate
+
+
+def insert_on_conflict_do_nothing(db: Session, model, index_elements: list, values: dict):
+    """Insert a row unless its natural key already exists.
+
+    Runs a single INSERT ... ON CONFLICT DO NOTHING RETURNING statement, so concurrent imports cannot create
+    duplicates. Returns the new object, or None if a row with the same key existed.
+    """
+    # the dialect modules are imported on use: loading the PostgreSQL dialect on SQLite only slows down startup
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    statement = dialect_insert(model).values(**values).on_conflict_do_nothing(
+        index_elements=index_elements).returning(model)
+    created = db.scalars(statement).first()
+    db.commit()
+    return created
 
 
 def get_event(db: Session, event_id: int) -> Optional[Event]:
@@ -47,24 +69,26 @@ def get_result_lists(db: Session, skip: int = 0, limit: int = 100):
 
 def get_result_list_by_event_creator_creation_time(
         db: Session, event: Event, creator: str, create_time: datetime.datetime) -> Optional[ResultList]:
-    return db.query(models.ResultList).filter(models.ResultList.event == event.id and models.ResultList.creator ==
-                                              creator and models.ResultList.create_time == create_time
-                                              ).first()
+    return db.query(models.ResultList).filter(models.ResultList.event_id == event.id,
+                                              models.ResultList.creator == creator,
+                                              models.ResultList.create_time == create_time).first()
 
 
 def find_or_create_result_list(db: Session, event: Event, status: ResultListStatusType, creator: str,
                                create_time: datetime.datetime) -> Optional[ResultList]:
-    result_list = get_result_list_by_event_creator_creation_time(db, event, creator, create_time)
-    if result_list:
-        return result_list
-    result_list_create = ResultListCreate(event=event, status=status, creator=creator, create_time=create_time)
-    return create_result_list(db, result_list_create)
+    result_list = ResultListCreate(event=event, status=status, creator=creator, create_time=create_time)
+    created = insert_on_conflict_do_nothing(
+        db, models.ResultList,
+        [models.ResultList.event_id, models.ResultList.creator, models.ResultList.create_time],
+        dict(event_id=result_list.event.id, status=result_list.status, creator=result_list.creator,
+             create_time=result_list.create_time))
+    return created or get_result_list_by_event_creator_creation_time(db, event, creator, create_time)
 
 
 def create_result_list(db: Session,
                        result_list: schemas.ResultListCreate) -> ResultList:
     db_result_list = models.ResultList(
-        event=result_list.event.id, status=result_list.status,
+        event_id=result_list.event.id, status=result_list.status,
         creator=result_list.creator,
         create_time=result_list.create_time)
     db.add(db_result_list)
@@ -82,7 +106,7 @@ def get_event_classes(db: Session, skip: int = 0, limit: int = 100):
 
 
 def get_event_class_by_name(db: Session, result_list_id: int, name: str) -> Optional[EventClass]:
-    return db.query(models.EventClass).filter(models.EventClass.name == name and
+    return db.query(models.EventClass).filter(models.EventClass.name == name,
                                               models.EventClass.result_list == result_list_id).first()
 
 
@@ -95,14 +119,14 @@ def find_or_create_event_class(db: Session,
                                max_number_of_team_members: int
                                ) -> \
         Optional[EventClass]:
-    event_class = get_event_class_by_name(db, result_list_id, name)
-    if event_class:
-        return event_class
-    return create_event_class(db, EventClassCreate(
+    event_class = EventClassCreate(
         result_list=result_list_id,
         name=name, short_name=short_name, sex=sex, result_list_mode=result_list_mode,
         status=status, min_number_of_team_members=min_number_of_team_members,
-        max_number_of_team_members=max_number_of_team_members))
+        max_number_of_team_members=max_number_of_team_members)
+    created = insert_on_conflict_do_nothing(
+        db, models.EventClass, [models.EventClass.result_list, models.EventClass.name], event_class.dict())
+    return created or get_event_class_by_name(db, result_list_id, name)
 
 
 def create_event_class(db: Session, event_class: schemas.EventClassCreate) -> EventClass:
@@ -146,10 +170,7 @@ def find_or_create_course(db: Session,
                           climb: float
                           ) -> \
         Optional[Course]:
-    course = get_course_by_race_number(db, result_list_id, event_class_id, race_number)
-    if course:
-        return course
-    return create_course(db, CourseCreate(
+    course = CourseCreate(
         result_list=result_list_id,
         event_class=event_class_id,
         race_number=race_number,
@@ -159,7 +180,11 @@ def find_or_create_course(db: Session,
         course_family=course_family,
         length=length,
         climb=climb
-        ))
+        )
+    created = insert_on_conflict_do_nothing(
+        db, models.Course, [models.Course.result_list, models.Course.event_class, models.Course.race_number],
+        course.dict())
+    return created or get_course_by_race_number(db, result_list_id, event_class_id, race_number)
 
 
 def create_course(db: Session, course: schemas.CourseCreate) -> Course:
@@ -178,3 +203,167 @@ def create_course(db: Session, course: schemas.CourseCreate) -> Course:
     db.commit()
     db.refresh(db_course)
     return db_course
+
+
+def get_organisation_by_name(db: Session, name: str) -> Optional[Organisation]:
+    return db.query(models.Organisation).filter(models.Organisation.name == name).first()
+
+
+def find_or_create_organisation(db: Session, name: str, short_name: str) -> Optional[Organisation]:
+    organisation = get_organisation_by_name(db, name)
+    if organisation:
+        return organisation
+    return create_organisation(db, OrganisationCreate(name=name, short_name=short_name))
+
+
+def create_organisation(db: Session, organisation: schemas.OrganisationCreate) -> Organisation:
+    db_organisation = models.Organisation(name=organisation.name, short_name=organisation.short_name)
+    db.add(db_organisation)
+    db.commit()
+    db.refresh(db_organisation)
+    return db_organisation
+
+
+def get_person_by_name(db: Session, family_name: str, given_name: str,
+                       birth_date: Optional[datetime.date]) -> Optional[Person]:
+    return db.query(models.Person).filter(models.Person.family_name == family_name,
+                                          models.Person.given_name == given_name,
+                                          models.Person.birth_date == birth_date).first()
+
+
+def find_or_create_person(db: Session, family_name: str, given_name: str, sex: SexType,
+                          birth_date: Optional[datetime.date]) -> Optional[Person]:
+    person = get_person_by_name(db, family_name, given_name, birth_date)
+    if person:
+        return person
+    return create_person(db, PersonCreate(family_name=family_name, given_name=given_name, sex=sex,
+                                          birth_date=birth_date))
+
+
+def create_person(db: Session, person: schemas.PersonCreate) -> Person:
+    db_person = models.Person(family_name=person.family_name, given_name=person.given_name, sex=person.sex,
+                              birth_date=person.birth_date)
+    db.add(db_person)
+    db.commit()
+    db.refresh(db_person)
+    return db_person
+
+
+def get_class_result_by_event_class(db: Session, result_list_id: int, event_class_id: int) -> Optional[ClassResult]:
+    return db.query(models.ClassResult).filter(models.ClassResult.result_list_id == result_list_id,
+                                               models.ClassResult.event_class_id == event_class_id).first()
+
+
+def find_or_create_class_result(db: Session, result_list_id: int, event_class_id: int,
+                                time_resolution: float) -> Optional[ClassResult]:
+    class_result = ClassResultCreate(result_list=result_list_id, event_class=event_class_id,
+                                     time_resolution=time_resolution)
+    created = insert_on_conflict_do_nothing(
+        db, models.ClassResult, [models.ClassResult.result_list_id, models.ClassResult.event_class_id],
+        dict(result_list_id=class_result.result_list, event_class_id=class_result.event_class,
+             time_resolution=class_result.time_resolution))
+    return created or get_class_result_by_event_class(db, result_list_id, event_class_id)
+
+
+def person_results_digest(person_results: list[schemas.PersonResultCreate]) -> str:
+    return hashlib.blake2b(repr([person_result.dict() for person_result in person_results]).encode(),
+                           digest_size=16).hexdigest()
+
+
+def replace_class_result(db: Session, class_result_id: int, person_results: list[schemas.PersonResultCreate],
+                         packed: bool = packed_splits.SPLIT_STORAGE == "packed") -> bool:
+    """Replace, rank and bump the version of the person results of a class result in a single transaction.
+
+    Nothing is written if the person results have the digest of the stored ones, so importing an unchanged class
+    keeps its version, and with it entity tags, cached responses and change notifications. Returns whether the
+    class result changed.
+    """
+    digest = person_results_digest(person_results)
+    if db.scalar(select(ClassResult.digest).where(ClassResult.id == class_result_id)) == digest:
+        db.commit()
+        return False
+    replace_person_results(db, class_result_id, person_results, packed, commit=False)
+    rank_class_result(db, class_result_id, commit=False)
+    bump_class_result_version(db, class_result_id, digest, commit=False)
+    db.commit()
+    return True
+
+
+def replace_person_results(db: Session, class_result_id: int, person_results: list[schemas.PersonResultCreate],
+                           packed: bool = packed_splits.SPLIT_STORAGE == "packed", commit: bool = True) -> None:
+    """Replace all person results of a class result in a single transaction, unless `commit` is unset.
+
+    Split times are written as split_times rows, or packed into their race result if `packed` is set.
+    """
+    race_result_ids = select(PersonRaceResult.id).join(PersonRaceResult.person_result).where(
+        PersonResult.class_result_id == class_result_id)
+    db.execute(delete(SplitTime).where(SplitTime.result_id.in_(race_result_ids)))
+    db.execute(delete(PersonRaceResult).where(PersonRaceResult.id.in_(race_result_ids)))
+    db.execute(delete(PersonResult).where(PersonResult.class_result_id == class_result_id))
+    # One multi-row INSERT per table instead of one per row. The order of RETURNING rows is not guaranteed (and
+    # SQLite cannot batch sort_by_parameter_order), so new ids are matched to the rows by key: person results with
+    # the same person and organisation are identical rows, race results are unique per person result and race.
+    race_results = []
+    if person_results:
+        person_result_ids = defaultdict(deque)
+        for person_result_id, person_id, organisation_id in db.execute(
+                insert(PersonResult).returning(PersonResult.id, PersonResult.person_id, PersonResult.organisation_id),
+                [{"class_result_id": class_result_id, "person_id": person_result.person,
+                  "organisation_id": person_result.organisation} for person_result in person_results]):
+            person_result_ids[(person_id, organisation_id)].append(person_result_id)
+        for person_result in person_results:
+            person_result_id = person_result_ids[(person_result.person, person_result.organisation)].popleft()
+            race_results.extend((person_result_id, race_result) for race_result in person_result.race_results)
+    if race_results:
+        race_result_ids = defaultdict(deque)
+        for race_result_id, person_result_id, race_number in db.execute(
+                insert(PersonRaceResult).returning(PersonRaceResult.id, PersonRaceResult.person_result_id,
+                                                   PersonRaceResult.race_number),
+                [{"person_result_id": person_result_id, **race_result.dict(exclude={"split_times"}),
+                  "packed_splits": packed_splits.pack(race_result.split_times) if packed else None}
+                 for person_result_id, race_result in race_results]):
+            race_result_ids[(person_result_id, race_number)].append(race_result_id)
+        split_times = []
+        for person_result_id, race_result in race_results if not packed else ():
+            race_result_id = race_result_ids[(person_result_id, race_result.race_number)].popleft()
+            split_times.extend({"result_id": race_result_id, **split_time.dict()}
+                               for split_time in race_result.split_times)
+        if split_times:
+            db.execute(insert(SplitTime), split_times)
+    if commit:
+        db.commit()
+
+
+def rank_class_result(db: Session, class_result_id: int, commit: bool = True) -> None:
+    """Recompute position and time_behind of all race results of a class result.
+
+    Runs as one UPDATE using window functions: runners with status OK and a time are ranked per race, everybody
+    else gets no position and no time behind.
+    """
+    ranked = and_(PersonRaceResult.status == ResultStatus.OK, PersonRaceResult.time.is_not(None))
+    partition_by = (PersonRaceResult.race_number, ranked)
+    ranking = select(
+        PersonRaceResult.id.label("id"),
+        case((ranked, func.rank().over(partition_by=partition_by, order_by=PersonRaceResult.time))).label(
+            "position"),
+        case((ranked, PersonRaceResult.time - func.min(PersonRaceResult.time).over(partition_by=partition_by))).label(
+            "time_behind")
+    ).join(PersonRaceResult.person_result).where(PersonResult.class_result_id == class_result_id).subquery()
+    db.execute(update(PersonRaceResult).where(PersonRaceResult.id == ranking.c.id).values(
+        position=ranking.c.position, time_behind=ranking.c.time_behind))
+    if commit:
+        db.commit()
+
+
+def bump_class_result_version(db: Session, class_result_id: int, digest: Optional[str] = None,
+                              commit: bool = True) -> None:
+    """Increment the version of a class result and store the digest of its person results."""
+    db.execute(update(ClassResult).where(ClassResult.id == class_result_id).values(
+        version=ClassResult.version + 1, digest=digest))
+    if commit:
+        db.commit()
+
+
+def bump_result_list_version(db: Session, result_list_id: int) -> None:
+    db.execute(update(ResultList).where(ResultList.id == result_list_id).values(version=ResultList.version + 1))
+    db.commit()
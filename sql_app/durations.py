@@ -0,0 +1,43 @@
+"""Durations stored as integer milliseconds.
+
+IOF documents, the schemas and the API give durations (times, time behind, split times and the time resolution of
+a class) in seconds. The database holds them as integer milliseconds, so rankings compare and subtract them exactly
+in SQL. The Milliseconds column type converts at the database edge; readers of raw rows, like the XML export and
+the split analysis, convert the integers themselves.
+"""
+from typing import Optional
+
+from sqlalchemy import Integer
+from sqlalchemy.types import TypeDecorator
+
+MILLISECONDS_PER_SECOND = 1000
+
+
+def to_milliseconds(seconds: float) -> int:
+    return round(seconds * MILLISECONDS_PER_SECOND)
+
+
+def to_seconds(milliseconds: int) -> float:
+    return milliseconds / MILLISECONDS_PER_SECOND
+
+
+def format_seconds(milliseconds: int) -> str:
+    """Seconds as the shortest decimal, without a fraction if there is none: 61000 -> '61', 61500 -> '61.5'."""
+    seconds, fraction = divmod(milliseconds, MILLISECONDS_PER_SECOND)
+    return str(seconds) if not fraction else repr(milliseconds / MILLISECONDS_PER_SECOND)
+
+
+class Milliseconds(TypeDecorator):
+    """Column type storing a duration in seconds as integer milliseconds."""
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[float], dialect) -> Optional[int]:
+        return None if value is None else round(value * MILLISECONDS_PER_SECOND)
+
+    def process_result_value(self, value: Optional[int], dialect) -> Optional[float]:
+        return None if value is None else value / MILLISECONDS_PER_SECOND
+
+    @property
+    def python_type(self):
+        return float
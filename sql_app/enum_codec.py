@@ -0,0 +1,92 @@
+"""Enums of IOF string values, stored as SMALLINT codes.
+
+Every member of an IofEnum is declared with its IOF value and an explicit code, `NAME = 'IofValue', code`. The codes
+are what the database holds (see the 0004 migration), so the code of a member never changes and the code of a
+removed member is not reused; the order of the members does not matter. Decoding goes through dicts and tuples built
+once per class, both from IOF strings (`get_enum_value`) and from stored codes (`EnumCode`).
+"""
+import enum
+import functools
+from typing import Optional
+
+from sqlalchemy import SmallInteger
+from sqlalchemy.types import TypeDecorator
+
+
+class IofEnum(enum.Enum):
+    """Enum whose values are the strings of the IOF data standard, with the code each member is stored as."""
+
+    def __new__(cls, value: str, code: int):
+        member = object.__new__(cls)
+        member._value_ = value
+        member.code = code
+        return member
+
+    @classmethod
+    def get_enum_value(cls, value_string: str):
+        try:
+            return cls._value2member_map_[value_string]
+        except (KeyError, TypeError):
+            raise ValueError('Invalid enum value: {}'.format(value_string)) from None
+
+    @classmethod
+    def from_string(cls, value_string: str):
+        """Member of an IOF value or, failing that, of a member name."""
+        member = cls._value2member_map_.get(value_string) or cls._member_map_.get(value_string)
+        if member is None:
+            raise ValueError('Invalid enum value: {}'.format(value_string))
+        return member
+
+
+@functools.cache
+def codes(enum_class: type[IofEnum]) -> dict[IofEnum, int]:
+    """Code by member; raises ValueError if two members share a code or a code is not positive."""
+    by_code = {}
+    for member in enum_class:
+        if member.code < 1 or by_code.setdefault(member.code, member) is not member:
+            raise ValueError(f"Invalid or duplicate code {member.code} of {member}")
+    return {member: code for code, member in by_code.items()}
+
+
+@functools.cache
+def members(enum_class: type[IofEnum]) -> tuple[Optional[IofEnum], ...]:
+    """Member by code, None for unused codes like 0."""
+    by_code = [None] * (max(codes(enum_class).values(), default=0) + 1)
+    for member, code in codes(enum_class).items():
+        by_code[code] = member
+    return tuple(by_code)
+
+
+@functools.cache
+def values(enum_class: type[IofEnum]) -> tuple[Optional[str], ...]:
+    """IOF value by code, for readers of the raw codes."""
+    return tuple(member and member.value for member in members(enum_class))
+
+
+class EnumCode(TypeDecorator):
+    """Column type storing the members of an IofEnum as their codes.
+
+    Bound values may also be IOF values or member names, as the string-based Enum type accepted.
+    """
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, enum_class: type[IofEnum]):
+        super().__init__()
+        self.enum_class = enum_class
+        self._codes = codes(enum_class)
+        self._members = members(enum_class)
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, str):
+            value = self.enum_class.from_string(value)
+        return self._codes[value]
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else self._members[value]
+
+    @property
+    def python_type(self):
+        return self.enum_class
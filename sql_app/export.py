@@ -0,0 +1,290 @@
+"""Streaming IOF 3.0 XML export of result lists, e.g. for federation uploads.
+
+The document is written straight from SQL rows: one query each for the result list and its event, the classes and
+the courses, and one streamed join of person results, race results and split times in document order. The rows are
+fetched in batches of BATCH_SIZE and every batch is turned into XML text at once by a ResultListEncoder, so memory
+does not grow with the size of the result list. The order of classes, runners and splits is the order of import.
+Split times packed into their race result (see packed_splits) come with the row of the race result.
+
+The streamed join runs on the connection rather than the ORM session, and its enum and duration columns are read as
+the stored codes and milliseconds and turned into IOF values by the encoder: processing the result rows otherwise
+takes longer than writing the XML.
+"""
+import datetime
+import enum
+from typing import AsyncIterator, BinaryIO, Optional
+
+from sqlalchemy import select, type_coerce, SmallInteger, Integer
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import enum_codec, packed_splits
+from .durations import format_seconds
+from .models import Event, ResultList, EventClass, Course, ClassResult, PersonResult, PersonRaceResult, Person, \
+    Organisation, SplitTime, ResultListModeType, EventClassStatus, SexType, ResultStatus, SplitTimeStatusType
+
+IOF_NAMESPACE = "http://www.orienteering.org/datastandard/3.0"
+MEDIA_TYPE = "application/xml"
+# Rows per fetch; every row is one split time (or a race result without any)
+BATCH_SIZE = 2000
+
+
+def _escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+_FORMATS = {
+    str: _escape,
+    float: _number,
+    int: str,
+    datetime.datetime: datetime.datetime.isoformat,
+    datetime.date: datetime.date.isoformat,
+}
+
+
+def _format(value) -> str:
+    if isinstance(value, enum.Enum):
+        return _escape(value.value)
+    return _FORMATS[type(value)](value)
+
+
+def _element(indent: str, tag: str, value) -> str:
+    return "" if value is None else f"{indent}<{tag}>{_format(value)}</{tag}>\n"
+
+
+def _attribute(name: str, value) -> str:
+    return "" if value is None else f' {name}="{_format(value)}"'
+
+
+def _unless(value, default):
+    """None for the default value of an attribute or element, which is then left out."""
+    return None if value == default else value
+
+
+# IOF values by stored code, None at code 0. A NULL split time status is written as OK, the default the importer
+# stores; a race result with a NULL status gets no Status element.
+SEXES = enum_codec.values(SexType)
+RESULT_STATUSES = enum_codec.values(ResultStatus)
+SPLIT_TIME_STATUSES = tuple(_unless(value, SplitTimeStatusType.OK.value)
+                            for value in enum_codec.values(SplitTimeStatusType))
+
+
+def _seconds(milliseconds: Optional[int]) -> Optional[str]:
+    return None if milliseconds is None else format_seconds(milliseconds)
+
+
+def _split_time(status: Optional[int], control_code: Optional[str], time: Optional[int]) -> str:
+    # the most frequent element, written without the generic _element and _format
+    time = "" if time is None else f"          <Time>{format_seconds(time)}</Time>\n"
+    return (f'        <SplitTime{_attribute("status", SPLIT_TIME_STATUSES[status or SplitTimeStatusType.OK.code])}>\n'
+            f'          <ControlCode>{_escape(control_code or "")}</ControlCode>\n'
+            f'{time}        </SplitTime>\n')
+
+
+CLASS_COLUMNS = (ClassResult.id, ClassResult.time_resolution, EventClass.id, EventClass.name, EventClass.short_name,
+                 EventClass.sex, EventClass.result_list_mode, EventClass.status,
+                 EventClass.min_number_of_team_members, EventClass.max_number_of_team_members)
+PERSON_RESULT_COLUMNS = (PersonResult.id, type_coerce(Person.sex, SmallInteger), Person.family_name, Person.given_name,
+                         Person.birth_date, Organisation.name, Organisation.short_name)
+RACE_RESULT_COLUMNS = (PersonRaceResult.id, PersonRaceResult.race_number, PersonRaceResult.bib_number,
+                       PersonRaceResult.start_time, PersonRaceResult.finish_time,
+                       type_coerce(PersonRaceResult.time, Integer), type_coerce(PersonRaceResult.time_behind, Integer),
+                       PersonRaceResult.position,
+                       type_coerce(PersonRaceResult.status, SmallInteger), PersonRaceResult.control_card,
+                       PersonRaceResult.packed_splits)
+SPLIT_TIME_COLUMNS = (SplitTime.id, type_coerce(SplitTime.status, SmallInteger), SplitTime.control_code,
+                      type_coerce(SplitTime.time, Integer))
+# Offsets of the column groups in a row of rows_query
+_PERSON_RESULT = 1
+_RACE_RESULT = _PERSON_RESULT + len(PERSON_RESULT_COLUMNS)
+_SPLIT_TIME = _RACE_RESULT + len(RACE_RESULT_COLUMNS)
+COURSE_COLUMNS = (Course.event_class, Course.race_number, Course.course_id, Course.name, Course.course_family,
+                  Course.length, Course.climb, Course.number_of_controls)
+
+
+def header_query(result_list_id: int):
+    return (select(ResultList.create_time, ResultList.creator, ResultList.status, Event.name, Event.status,
+                   Event.classification, Event.form)
+            .join(Event, ResultList.event_id == Event.id).where(ResultList.id == result_list_id))
+
+
+def classes_query(result_list_id: int):
+    return (select(*CLASS_COLUMNS).join(EventClass, ClassResult.event_class_id == EventClass.id)
+            .where(ClassResult.result_list_id == result_list_id))
+
+
+def courses_query(result_list_id: int):
+    return (select(*COURSE_COLUMNS).where(Course.result_list == result_list_id)
+            .order_by(Course.event_class, Course.race_number))
+
+
+def rows_query(result_list_id: int):
+    return (select(ClassResult.id, *PERSON_RESULT_COLUMNS, *RACE_RESULT_COLUMNS, *SPLIT_TIME_COLUMNS)
+            .outerjoin(PersonResult, PersonResult.class_result_id == ClassResult.id)
+            .outerjoin(Person, PersonResult.person_id == Person.id)
+            .outerjoin(Organisation, PersonResult.organisation_id == Organisation.id)
+            .outerjoin(PersonRaceResult, PersonRaceResult.person_result_id == PersonResult.id)
+            .outerjoin(SplitTime, SplitTime.result_id == PersonRaceResult.id)
+            .where(ClassResult.result_list_id == result_list_id)
+            .order_by(ClassResult.id, PersonResult.id, PersonRaceResult.id, SplitTime.id)
+            .execution_options(yield_per=BATCH_SIZE))
+
+
+class ResultListEncoder:
+    """Turns the rows of `rows_query`, batch by batch, into the text of a ResultList document.
+
+    Elements are closed when a row of the next class, person result or race result arrives, so the encoder only
+    keeps the ids of the open elements and the control card of the open race result, which follows its splits.
+    """
+
+    def __init__(self, header, classes, courses):
+        self.header = header
+        self.classes = {class_result[0]: class_result[1:] for class_result in classes}
+        self.courses: dict[int, list] = {}
+        for course in courses:
+            self.courses.setdefault(course[0], []).append(course[1:])
+        self.class_result_id = self.person_result_id = self.race_result_id = None
+        self.control_card = None
+
+    def start(self) -> str:
+        create_time, creator, status, event_name, event_status, classification, form = self.header
+        return (f'<?xml version="1.0" encoding="UTF-8"?>\n'
+                f'<ResultList xmlns="{IOF_NAMESPACE}" iofVersion="3.0"{_attribute("createTime", create_time)}'
+                f'{_attribute("creator", creator)}{_attribute("status", status)}>\n'
+                f'  <Event>\n{_element("    ", "Name", event_name)}{_element("    ", "Status", event_status)}'
+                f'{_element("    ", "Classification", classification)}{_element("    ", "Form", form)}  </Event>\n')
+
+    def encode(self, rows) -> str:
+        out = []
+        for row in rows:
+            if row[0] != self.class_result_id:
+                self._close_class(out)
+                self.class_result_id = row[0]
+                self._open_class(out, *self.classes[row[0]])
+            person_result_id = row[_PERSON_RESULT]
+            if person_result_id is None:
+                continue
+            if person_result_id != self.person_result_id:
+                self._close_person_result(out)
+                self.person_result_id = person_result_id
+                self._open_person_result(out, *row[_PERSON_RESULT + 1:_RACE_RESULT])
+            race_result_id = row[_RACE_RESULT]
+            if race_result_id is None:
+                continue
+            if race_result_id != self.race_result_id:
+                self._close_race_result(out)
+                self.race_result_id = race_result_id
+                self.control_card, packed = row[_SPLIT_TIME - 2:_SPLIT_TIME]
+                self._open_race_result(out, *row[_RACE_RESULT + 1:_SPLIT_TIME - 2])
+                if packed is not None:
+                    control_codes, statuses, times = packed_splits.unpack(packed)
+                    out.extend(map(_split_time, statuses, control_codes,
+                                   (None if time == packed_splits.MISSING else time for time in times)))
+            split_time_id, status, control_code, time = row[_SPLIT_TIME:]
+            if split_time_id is not None:
+                out.append(_split_time(status, control_code, time))
+        return "".join(out)
+
+    def _open_class(self, out: list, time_resolution, event_class_id, name, short_name, sex, result_list_mode, status,
+                    min_team_members, max_team_members):
+        out.append(f'  <ClassResult{_attribute("timeResolution", _unless(time_resolution, 1))}>\n'
+                   f'    <Class{_attribute("sex", sex)}'
+                   f'{_attribute("minNumberOfTeamMembers", min_team_members)}'
+                   f'{_attribute("maxNumberOfTeamMembers", max_team_members)}'
+                   f'{_attribute("resultListMode", _unless(result_list_mode, ResultListModeType.DEFAULT))}>\n'
+                   f'{_element("      ", "Name", name)}{_element("      ", "ShortName", short_name)}'
+                   f'{_element("      ", "Status", _unless(status, EventClassStatus.NORMAL))}'
+                   f'    </Class>\n')
+        for race_number, course_id, name, course_family, length, climb, number_of_controls in \
+                self.courses.get(event_class_id, ()):
+            out.append(f'    <Course{_attribute("raceNumber", _unless(race_number, 1))}>\n'
+                       f'{_element("      ", "Id", course_id)}{_element("      ", "Name", name)}'
+                       f'{_element("      ", "CourseFamily", course_family)}'
+                       f'{_element("      ", "Length", length)}{_element("      ", "Climb", climb)}'
+                       f'{_element("      ", "NumberOfControls", number_of_controls)}    </Course>\n')
+
+    @staticmethod
+    def _open_person_result(out: list, sex, family_name, given_name, birth_date, organisation_name,
+                            organisation_short_name):
+        out.append(f'    <PersonResult>\n'
+                   f'      <Person{_attribute("sex", SEXES[sex or 0])}>\n'
+                   f'        <Name>\n'
+                   f'          <Family>{_escape(family_name or "")}</Family>\n'
+                   f'          <Given>{_escape(given_name or "")}</Given>\n'
+                   f'        </Name>\n'
+                   f'{_element("        ", "BirthDate", birth_date)}'
+                   f'      </Person>\n')
+        if organisation_name is not None or organisation_short_name is not None:
+            out.append(f'      <Organisation>\n{_element("        ", "Name", organisation_name)}'
+                       f'{_element("        ", "ShortName", organisation_short_name)}      </Organisation>\n')
+
+    @staticmethod
+    def _open_race_result(out: list, race_number, bib_number, start_time, finish_time, time, time_behind, position,
+                          status):
+        out.append(f'      <Result{_attribute("raceNumber", _unless(race_number, 1))}>\n'
+                   f'{_element("        ", "BibNumber", bib_number)}'
+                   f'{_element("        ", "StartTime", start_time)}'
+                   f'{_element("        ", "FinishTime", finish_time)}'
+                   f'{_element("        ", "Time", _seconds(time))}'
+                   f'{_element("        ", "TimeBehind", _seconds(time_behind))}'
+                   f'{_element("        ", "Position", position)}'
+                   f'{_element("        ", "Status", RESULT_STATUSES[status or 0])}')
+
+    def end(self) -> str:
+        out = []
+        self._close_class(out)
+        out.append("</ResultList>\n")
+        return "".join(out)
+
+    def _close_race_result(self, out: list):
+        if self.race_result_id is not None:
+            out.append(f'{_element("        ", "ControlCard", self.control_card)}      </Result>\n')
+            self.race_result_id = None
+
+    def _close_person_result(self, out: list):
+        self._close_race_result(out)
+        if self.person_result_id is not None:
+            out.append("    </PersonResult>\n")
+            self.person_result_id = None
+
+    def _close_class(self, out: list):
+        self._close_person_result(out)
+        if self.class_result_id is not None:
+            out.append("  </ClassResult>\n")
+            self.class_result_id = None
+
+
+async def result_list_xml(db: AsyncSession, result_list_id: int) -> Optional[AsyncIterator[bytes]]:
+    """The document of a result list as an iterator of UTF-8 chunks, or None if there is no such result list."""
+    header = (await db.execute(header_query(result_list_id))).first()
+    if header is None:
+        return None
+    encoder = ResultListEncoder(header, await db.execute(classes_query(result_list_id)),
+                                await db.execute(courses_query(result_list_id)))
+
+    async def chunks():
+        yield encoder.start().encode()
+        connection = await db.connection()
+        async for rows in (await connection.stream(rows_query(result_list_id))).partitions():
+            yield encoder.encode(rows).encode()
+        yield encoder.end().encode()
+
+    return chunks()
+
+
+def write_result_list_xml(db: Session, result_list_id: int, out: BinaryIO) -> bool:
+    """Write the document of a result list to `out`; False if there is no such result list."""
+    header = db.execute(header_query(result_list_id)).first()
+    if header is None:
+        return False
+    encoder = ResultListEncoder(header, db.execute(classes_query(result_list_id)),
+                                db.execute(courses_query(result_list_id)))
+    out.write(encoder.start().encode())
+    for rows in db.connection().execute(rows_query(result_list_id)).partitions():
+        out.write(encoder.encode(rows).encode())
+    out.write(encoder.end().encode())
+    return True
@@ -1,12 +1,39 @@
-from fastapi import FastAPI, HTTPException, Depends
+import asyncio
+from typing import Optional, Callable, Awaitable
 
-from . import schemas, crud
-from .database import SessionLocal
+from fastapi import FastAPI, HTTPException, Depends, Header, Response, Query
+from fastapi.responses import StreamingResponse
+
+from . import schemas, crud, serializers, search, compression, metrics, export
+from .presenter import Scoreboard
+from .database import SessionLocal, AsyncSessionLocal, async_engine
+from .broadcast import BroadcastHub, watch_versions
+from .versions import VersionRegistry, CACHE_CONTROL, etag_matches
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 # models.Base.metadata.create_all(bind=engine)
 
 app = FastAPI()
+app.add_middleware(metrics.MetricsMiddleware)
+
+versions = VersionRegistry(async_engine)
+hub = BroadcastHub()
+response_cache = serializers.ResponseCache()
+scoreboard = Scoreboard(versions)
+
+KEEPALIVE_INTERVAL = 15.0
+
+
+@app.on_event("startup")
+async def start_version_watcher():
+    app.state.version_watcher = asyncio.create_task(watch_versions(versions, hub))
+
+
+@app.on_event("shutdown")
+async def stop_version_watcher():
+    app.state.version_watcher.cancel()
+    await async_engine.dispose()
 
 
 # Dependency
@@ -18,6 +45,12 @@ def get_db():
     finally:
         db.close()
 
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 @app.post("/events/", response_model=schemas.Event)
 def create_event(event: schemas.EventCreate, db: Session = Depends(get_db)):
     db_event = crud.get_event_by_name(db, name=event.name)
@@ -26,13 +59,147 @@ def create_event(event: schemas.EventCreate, db: Session = Depends(get_db)):
     return crud.create_event(db=db, event=event)
 
 
+def json_response(body: bytes, etag: str = None, encoding: str = None) -> Response:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"} if etag else {}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers or None)
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"})
+
+
+async def cached_json_response(etag: Optional[str], build: Callable[[], Awaitable[Optional[bytes]]],
+                               if_none_match: Optional[str], accept_encoding: Optional[str],
+                               not_found: str = "Class result not found") -> Response:
+    """Respond with the cached body of `etag`, built on first use and compressed once per content encoding.
+
+    Every encoding is a representation with its own entity tag, so a client that revalidates gets a 304 for the
+    tag it holds. Without an entity tag the body is built for this request only and sent uncompressed.
+    """
+    if etag is None:
+        body = await build()
+        if body is None:
+            raise HTTPException(status_code=404, detail=not_found)
+        return json_response(body)
+    for representation in compression.representation_etags(etag):
+        if etag_matches(if_none_match, representation):
+            return not_modified(representation)
+    body = await response_cache.get_or_build(etag, build)
+    if body is None:
+        raise HTTPException(status_code=404, detail=not_found)
+    encoding = compression.negotiate(accept_encoding) if len(body) >= compression.MIN_SIZE else None
+    if encoding:
+        body = await response_cache.encoded(etag, body, encoding)
+    return json_response(body, compression.encoded_etag(etag, encoding), encoding)
+
+
+# The read endpoints return pre-serialized JSON (see serializers); response_model only documents the payload.
+
 @app.get("/events/", response_model=list[schemas.Event])
-def read_events(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    events = crud.get_events(db, skip=skip, limit=limit)
-    return events
+async def read_events(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+    return json_response(await serializers.events_json(db, skip=skip, limit=limit))
 
 
 @app.get("/result_lists/", response_model=list[schemas.ResultList])
-def read_result_lists(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    result_lists = crud.get_result_lists(db, skip=skip, limit=limit)
-    return result_lists
+async def read_result_lists(skip: int = 0, limit: int = 100, if_none_match: str = Header(None),
+                            accept_encoding: str = Header(None), db: AsyncSession = Depends(get_async_db)):
+    etag = await versions.result_lists_etag(skip, limit)
+    return await cached_json_response(etag, lambda: serializers.result_lists_json(db, skip=skip, limit=limit),
+                                      if_none_match, accept_encoding)
+
+
+@app.get("/result_lists/{result_list_id}.xml", response_class=StreamingResponse)
+async def export_result_list(result_list_id: int, db: AsyncSession = Depends(get_async_db)):
+    """The result list as an IOF 3.0 XML document, streamed from the database."""
+    chunks = await export.result_list_xml(db, result_list_id)
+    if chunks is None:
+        raise HTTPException(status_code=404, detail="Result list not found")
+    return StreamingResponse(chunks, media_type=export.MEDIA_TYPE)
+
+
+@app.get("/result_lists/{result_list_id}/classes/{class_id}", response_model=schemas.ClassResult)
+async def read_class_result(result_list_id: int, class_id: int, if_none_match: str = Header(None),
+                            accept_encoding: str = Header(None), db: AsyncSession = Depends(get_async_db)):
+    # No entity tag while the class is not in the version snapshot (yet), so there is nothing to key the cache on.
+    etag = await versions.class_result_etag(result_list_id, class_id)
+    return await cached_json_response(etag, lambda: serializers.class_result_json(db, result_list_id, class_id),
+                                      if_none_match, accept_encoding)
+
+
+@app.get("/result_lists/{result_list_id}/classes/{class_id}/splits", response_model=schemas.ClassSplits)
+async def read_class_splits(result_list_id: int, class_id: int, race_number: int = 1,
+                            if_none_match: str = Header(None), accept_encoding: str = Header(None),
+                            db: AsyncSession = Depends(get_async_db)):
+    etag = await versions.class_result_etag(result_list_id, class_id, variant=f"-splits-{race_number}")
+
+    async def build():
+        from . import analysis  # NumPy is loaded with the first analysis request, not at startup
+
+        splits = await analysis.class_splits(db, result_list_id, class_id, race_number)
+        return serializers.dumps(splits) if splits is not None else None
+
+    return await cached_json_response(etag, build, if_none_match, accept_encoding)
+
+
+@app.get("/result_lists/{result_list_id}/classes/{class_id}/time_loss", response_model=schemas.ClassTimeLosses)
+async def read_class_time_losses(result_list_id: int, class_id: int, race_number: int = 1,
+                                 if_none_match: str = Header(None), accept_encoding: str = Header(None),
+                                 db: AsyncSession = Depends(get_async_db)):
+    # Estimated once per class version; the response cache keeps the result until the next import.
+    etag = await versions.class_result_etag(result_list_id, class_id, variant=f"-time-loss-{race_number}")
+
+    async def build():
+        from . import analysis
+
+        time_losses = await analysis.class_time_losses(db, result_list_id, class_id, race_number)
+        return serializers.dumps(time_losses) if time_losses is not None else None
+
+    return await cached_json_response(etag, build, if_none_match, accept_encoding)
+
+
+@app.get("/presenter/{event_id}/pages", response_model=list[schemas.PresenterPage])
+async def read_presenter_pages(event_id: int, rows: int = Query(25, ge=1, le=1000), race_number: int = 1,
+                               if_none_match: str = Header(None), accept_encoding: str = Header(None),
+                               db: AsyncSession = Depends(get_async_db)):
+    """Standings of the latest result list of an event, split into pages of `rows` runners per class."""
+    etag = await scoreboard.etag(event_id, rows, race_number)
+    if etag is None:
+        raise HTTPException(status_code=404, detail="No results for event")
+
+    async def build():
+        return serializers.dumps(await scoreboard.pages(db, event_id, rows, race_number))
+
+    return await cached_json_response(etag, build, if_none_match, accept_encoding)
+
+
+@app.get("/search", response_model=schemas.SearchResult)
+async def search_names(q: str, limit: int = Query(20, ge=1, le=100), db: AsyncSession = Depends(get_async_db)):
+    """Persons and organisations with a name word starting with every word of `q`."""
+    return json_response(serializers.dumps(await search.search(db, q, limit)))
+
+
+@app.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    """Request, database and importer metrics of this process in the Prometheus text format."""
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/events/{event_id}/changes", response_class=StreamingResponse)
+async def stream_changes(event_id: int, classes: list[int] = Query(None)):
+    """Server-sent events stream with one `change` message per class result the importer updated."""
+    subscription = hub.subscribe(event_id, classes)
+
+    async def messages():
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscription.queue.get(), KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+        finally:
+            hub.unsubscribe(subscription)
+
+    return StreamingResponse(messages(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
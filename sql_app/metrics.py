@@ -0,0 +1,250 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+Metrics are plain dicts updated in place: recording a sample is a dict lookup and an addition, cheap enough for
+every request and every query. Updates from the threadpool (sync endpoints, the write engine) are not locked; a
+lost increment under contention is acceptable for monitoring.
+"""
+import bisect
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from sqlalchemy import event, Engine, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# the response adds "; charset=utf-8"
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Upper bounds in seconds, from cache hits to slow standings
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _label_string(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    labels = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        labels.append(extra)
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = (), registry: Registry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.values: dict[tuple, float] = {}
+        registry.register(self)
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self) -> list[str]:
+        return [f"{self.name}{_label_string(self.labels, labels)} {_number(value)}"
+                for labels, value in list(self.values.items())]
+
+
+class Gauge:
+    """Gauge read at scrape time from `collect`, which returns the value per label values."""
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...], collect: Callable[[], dict],
+                 registry: Registry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.collect = collect
+        registry.register(self)
+
+    def samples(self) -> list[str]:
+        return [f"{self.name}{_label_string(self.labels, labels)} {_number(value)}"
+                for labels, value in self.collect().items()]
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS, registry: Registry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [count per bucket (the last one is +Inf), sum]
+        self.values: dict[tuple, list] = {}
+        registry.register(self)
+
+    def observe(self, labels: tuple, value: float):
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def samples(self) -> list[str]:
+        lines = []
+        for labels, (counts, total) in list(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                bucket_labels = _label_string(self.labels, labels, f'le="{_number(bound)}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_string(self.labels, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_label_string(self.labels, labels)} {cumulative}")
+        return lines
+
+
+REQUEST_DURATION = Histogram("http_request_duration_seconds", "Time to handle a request, by route template.",
+                             ("method", "route", "status"))
+REQUEST_QUERIES = Histogram("http_request_db_queries", "Database queries run for a request.",
+                            ("method", "route"), QUERY_COUNT_BUCKETS)
+REQUEST_QUERY_DURATION = Histogram("http_request_db_duration_seconds", "Time spent in database queries per request.",
+                                   ("method", "route"))
+QUERIES = Counter("db_queries_total", "Database queries run.", ("engine",))
+QUERY_DURATION = Counter("db_query_duration_seconds_total", "Time spent in database queries.", ("engine",))
+POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Connections checked out of the pool.", ("engine",))
+POOL_CONNECTS = Counter("db_pool_connections_created_total", "New database connections opened.", ("engine",))
+POOL_ACQUIRE = Histogram("db_pool_acquire_seconds",
+                         "Time to get a connection from the pool, including waiting for a free one.", ("engine",))
+POOL_TIMEOUTS = Counter("db_pool_timeouts_total", "Requests that gave up waiting for a connection.", ("engine",))
+IMPORTED = Counter("importer_records_total", "Records written by the importer, by kind.", ("kind",))
+IMPORT_DURATION = Counter("importer_duration_seconds_total", "Time spent importing result lists.")
+
+# engine name -> engine; the pool is looked up on every scrape since dispose() replaces it
+_engines: dict[str, Engine] = {}
+
+
+def _pool_sizes() -> dict[tuple, float]:
+    return {(name, state): getattr(engine.pool, state)() for name, engine in _engines.items()
+            for state in ("checkedout", "checkedin") if hasattr(engine.pool, state)}
+
+
+POOL_CONNECTIONS = Gauge("db_pool_connections", "Open connections, checked out (in use) or checked in (idle).",
+                         ("engine", "state"), _pool_sizes)
+
+
+class RequestStats:
+    __slots__ = ("queries", "duration")
+
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0.0
+
+
+# Statistics of the request being handled; copied into the greenlets SQLAlchemy runs async queries in
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def instrument_engine(engine: Engine, name: str):
+    """Count queries, query time, checkouts and new connections of a (sync) engine."""
+    labels = (name,)
+    _engines[name] = engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_query(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def end_query(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - context._metrics_started
+        QUERIES.inc(labels)
+        QUERY_DURATION.inc(labels, duration)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.duration += duration
+
+    @event.listens_for(engine, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        POOL_CHECKOUTS.inc(labels)
+
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection, connection_record):
+        POOL_CONNECTS.inc(labels)
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool of an async engine that records how long requests wait for a connection.
+
+    Subclassed per engine name by `instrumented_pool_class`, so that the pool recreated by dispose() keeps it.
+    """
+    _metrics_labels: tuple[str] = ()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS.inc(self._metrics_labels)
+            raise
+        finally:
+            POOL_ACQUIRE.observe(self._metrics_labels, time.perf_counter() - started)
+
+
+def instrumented_pool_class(name: str) -> type[InstrumentedAsyncQueuePool]:
+    """Pool class for `create_async_engine(..., poolclass=...)`, labelled with the engine name given to
+    `instrument_engine`."""
+    return type(f"InstrumentedAsyncQueuePool_{name}", (InstrumentedAsyncQueuePool,), {"_metrics_labels": (name,)})
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and database usage per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - started
+            _request_stats.reset(token)
+            route = scope.get("route")
+            labels = (scope["method"], route.path if route is not None else "unmatched")
+            REQUEST_DURATION.observe(labels + (status,), duration)
+            REQUEST_QUERIES.observe(labels, stats.queries)
+            REQUEST_QUERY_DURATION.observe(labels, stats.duration)
@@ -1,7 +1,8 @@
-import enum
+from sqlalchemy import Integer, String, ForeignKey, DateTime, Double, Date, Index, LargeBinary
+from sqlalchemy.orm import mapped_column, DeclarativeBase, relationship
 
-from sqlalchemy import Column, Integer, String, Enum, ForeignKey, DateTime, Float, Double, Date
-from sqlalchemy.orm import mapped_column, DeclarativeBase
+from .durations import Milliseconds
+from .enum_codec import IofEnum, EnumCode
 
 
 # declarative base class
@@ -9,47 +10,37 @@ class Base(DeclarativeBase):
     pass
 
 
-class EventStatus(enum.Enum):
-    PLANNED = 'Planned'  # The event or race is on a planning stadium and has not been submitted to any sanctioning
+class EventStatus(IofEnum):
+    PLANNED = 'Planned', 1  # The event or race is on a planning stadium and has not been submitted to any sanctioning
     # body.
-    APPLIED = 'Applied'  # The organiser has submitted the event to the relevant sanctioning body.
-    PROPOSED = 'Proposed'  # The organiser has bid on hosting the event or race as e.g. a championship.
-    SANCTIONED = 'Sanctioned'  # The event oc race meets the relevant requirements and will happen.
-    CANCELED = 'Canceled'  # The event or race has been canceled, e.g. due to weather conditions.
-    RESCHEDULED = 'Rescheduled'  # The date of the event or race has changed. A new Event or Race element should be
+    APPLIED = 'Applied', 2  # The organiser has submitted the event to the relevant sanctioning body.
+    PROPOSED = 'Proposed', 3  # The organiser has bid on hosting the event or race as e.g. a championship.
+    SANCTIONED = 'Sanctioned', 4  # The event oc race meets the relevant requirements and will happen.
+    CANCELED = 'Canceled', 5  # The event or race has been canceled, e.g. due to weather conditions.
+    RESCHEDULED = 'Rescheduled', 6  # The date of the event or race has changed. A new Event or Race element should be
     # created in addition to the already existing element.
 
 
-class EventClassification(enum.Enum):
-    INTERNATIONAL = 'International'
-    NATIONAL = 'National'
-    REGIONAL = 'Regional'
-    LOCAL = 'Local'
-    CLUB = 'Club'
+class EventClassification(IofEnum):
+    INTERNATIONAL = 'International', 1
+    NATIONAL = 'National', 2
+    REGIONAL = 'Regional', 3
+    LOCAL = 'Local', 4
+    CLUB = 'Club', 5
 
 
-class EventForm(enum.Enum):
-    INDIVIDUAL = 'Individual'
-    TEAM = 'Team'
-    RELAY = 'Relay'
+class EventForm(IofEnum):
+    INDIVIDUAL = 'Individual', 1
+    TEAM = 'Team', 2
+    RELAY = 'Relay', 3
 
 
-class ResultListStatusType(enum.Enum):
-    COMPLETE = 'Complete'  # The result list is complete, i.e. all competitors are included. Used for official
+class ResultListStatusType(IofEnum):
+    COMPLETE = 'Complete', 1  # The result list is complete, i.e. all competitors are included. Used for official
     # results after the event.
-    DELTA = 'Delta'  # The result list only contains changes since last list. Used for frequent exchange of results.
-    SNAPSHOT = 'Snapshot'  # The result list is a snapshot of the current standings. Used while the event is under way.
-
-    @staticmethod
-    def get_enum_value(value_string: str):
-        if value_string == ResultListStatusType.COMPLETE.value:
-            return ResultListStatusType.COMPLETE
-        elif value_string == ResultListStatusType.DELTA.value:
-            return ResultListStatusType.DELTA
-        elif value_string == ResultListStatusType.SNAPSHOT.value:
-            return ResultListStatusType.SNAPSHOT
-        else:
-            raise ValueError('Invalid enum value: {}'.format(value_string))
+    DELTA = 'Delta', 2  # The result list only contains changes since last list. Used for frequent exchange of results.
+    SNAPSHOT = 'Snapshot', 3  # The result list is a snapshot of the current standings. Used while the event is under
+    # way.
 
 
 class Organisation(Base):
@@ -65,100 +56,73 @@ class Event(Base):
 
     id = mapped_column(Integer, primary_key=True, index=True)
     name = mapped_column(String, index=True, nullable=False)
-    status = mapped_column(Enum(EventStatus))
-    classification = mapped_column(Enum(EventClassification))
-    form = mapped_column(Enum(EventForm))
+    status = mapped_column(EnumCode(EventStatus))
+    classification = mapped_column(EnumCode(EventClassification))
+    form = mapped_column(EnumCode(EventForm))
     organisation = mapped_column(Integer, ForeignKey("organisations.id"))
 
 
 class ResultList(Base):
     __tablename__ = "result_lists"
+    __table_args__ = (Index("ix_result_lists_event_creator_create_time", "event", "creator", "create_time",
+                            unique=True),)
 
     id = mapped_column(Integer, primary_key=True, index=True)
-    event = mapped_column(Integer, ForeignKey("events.id"))
-    status = mapped_column(Enum(ResultListStatusType))
+    event_id = mapped_column("event", Integer, ForeignKey("events.id"))
+    status = mapped_column(EnumCode(ResultListStatusType))
     create_time = mapped_column(DateTime)
     creator = mapped_column(String)
+    version = mapped_column(Integer, nullable=False, default=0)  # bumped when an import changes one of its classes
 
-    # class_results = relationship("ClassResult", back_populates="result_list")
+    event = relationship("Event", lazy="joined")
+    class_results = relationship("ClassResult", back_populates="result_list")
 
 
-class ResultListModeType(enum.Enum):
-    DEFAULT = 'Default'  # The result list should include place and time for each competitor, and be ordered by place.
-    UNORDERED = 'Unordered'  # The result list should include place and time for each competitor, but be unordered
+class ResultListModeType(IofEnum):
+    DEFAULT = 'Default', 1  # The result list should include place and time for each competitor, and be ordered by
+    # place.
+    UNORDERED = 'Unordered', 2  # The result list should include place and time for each competitor, but be unordered
     # with respect to times (e.g. sorted by competitor name).
-    UNORDERED_NO_TIMES = 'UnorderedNoTimes'  # The result list should not include any places and times,
+    UNORDERED_NO_TIMES = 'UnorderedNoTimes', 3  # The result list should not include any places and times,
 
     # and be unordered with respect to times (e.g. sorted by competitor name).
 
-    @staticmethod
-    def get_enum_value(value_string: str):
-        if value_string == ResultListModeType.DEFAULT.value:
-            return ResultListModeType.DEFAULT
-        elif value_string == ResultListModeType.UNORDERED.value:
-            return ResultListModeType.UNORDERED
-        elif value_string == ResultListModeType.UNORDERED_NO_TIMES.value:
-            return ResultListModeType.UNORDERED_NO_TIMES
-        else:
-            raise ValueError('Invalid enum value: {}'.format(value_string))
-
-
-class SexType(enum.Enum):
-    F = 'F'
-    M = 'M'
-
-    @staticmethod
-    def get_enum_value(value_string: str):
-        if value_string == SexType.F.value:
-            return SexType.F
-        elif value_string == SexType.M.value:
-            return SexType.M
-        else:
-            raise ValueError('Invalid enum value: {}'.format(value_string))
-
-
-class EventClassStatus(enum.Enum):
-    NORMAL = 'Normal'  # The default status.
-    DIVIDED = 'Divided'  # The class has been divided in two or more classes due to a large number of entries.
-    JOINED = 'Joined'  # The class has been joined with another class due to a small number of entries.
-    INVALIDATED = 'Invalidated'  # The results are considered invalid due to technical issues such as misplaced
+
+class SexType(IofEnum):
+    F = 'F', 1
+    M = 'M', 2
+
+
+class EventClassStatus(IofEnum):
+    NORMAL = 'Normal', 1  # The default status.
+    DIVIDED = 'Divided', 2  # The class has been divided in two or more classes due to a large number of entries.
+    JOINED = 'Joined', 3  # The class has been joined with another class due to a small number of entries.
+    INVALIDATED = 'Invalidated', 4  # The results are considered invalid due to technical issues such as misplaced
     # controls. Entry fees are not refunded.
-    INVALIDATED_NO_FEE = 'InvalidatedNoFee'  # The results are considered invalid due to technical issues such as
+    INVALIDATED_NO_FEE = 'InvalidatedNoFee', 5  # The results are considered invalid due to technical issues such as
 
     # misplaced controls. Entry fees are refunded.
 
-    @staticmethod
-    def get_enum_value(value_string: str):
-        if value_string == EventClassStatus.NORMAL.value:
-            return EventClassStatus.NORMAL
-        elif value_string == EventClassStatus.DIVIDED.value:
-            return EventClassStatus.DIVIDED
-        elif value_string == EventClassStatus.JOINED.value:
-            return EventClassStatus.JOINED
-        elif value_string == EventClassStatus.INVALIDATED.value:
-            return EventClassStatus.INVALIDATED
-        elif value_string == EventClassStatus.INVALIDATED_NO_FEE.value:
-            return EventClassStatus.INVALIDATED_NO_FEE
-        else:
-            raise ValueError('Invalid enum value: {}'.format(value_string))
-
 
 class EventClass(Base):
     __tablename__ = "event_classes"
+    __table_args__ = (Index("ix_event_classes_result_list_name", "result_list", "name", unique=True),)
 
     id = mapped_column(Integer, primary_key=True, index=True, nullable=True)
     result_list = mapped_column(Integer, ForeignKey("result_lists.id"))
     name = mapped_column(String)
     short_name = mapped_column(String, nullable=True)
-    result_list_mode = mapped_column(Enum(ResultListModeType))
-    status = mapped_column(Enum(EventClassStatus))
-    sex = mapped_column(Enum(SexType))
+    result_list_mode = mapped_column(EnumCode(ResultListModeType))
+    status = mapped_column(EnumCode(EventClassStatus))
+    sex = mapped_column(EnumCode(SexType))
     min_number_of_team_members = mapped_column(Integer, default=1)
     max_number_of_team_members = mapped_column(Integer, default=1)
 
 
 class Course(Base):
     __tablename__ = "courses"
+    __table_args__ = (Index("ix_courses_result_list_event_class_race_number", "result_list", "event_class",
+                            "race_number", unique=True),)
 
     id = mapped_column(Integer, primary_key=True, index=True)
     result_list = mapped_column(Integer, ForeignKey("result_lists.id"))
@@ -174,18 +138,25 @@ class Course(Base):
 
 class ClassResult(Base):
     __tablename__ = "class_results"
+    __table_args__ = (Index("ix_class_results_result_list_event_class", "result_list", "event_class", unique=True),)
 
     id = mapped_column(Integer, primary_key=True, index=True)
-    time_resolution = mapped_column(Float, nullable=False)
-    event_class = Column(Integer, ForeignKey("event_classes.id"))
-    result_list = Column(Integer, ForeignKey("result_lists.id"))
+    time_resolution = mapped_column(Milliseconds, nullable=False)
+    event_class_id = mapped_column("event_class", Integer, ForeignKey("event_classes.id"), index=True)
+    result_list_id = mapped_column("result_list", Integer, ForeignKey("result_lists.id"), index=True)
+    version = mapped_column(Integer, nullable=False, default=0)  # bumped by the importer when the results change
+    digest = mapped_column(String(32), nullable=True)  # of the imported person results, see crud.replace_class_result
+
+    event_class = relationship("EventClass")
+    result_list = relationship("ResultList", back_populates="class_results")
+    person_results = relationship("PersonResult", back_populates="class_result", order_by="PersonResult.id")
 
 
 class Person(Base):
     __tablename__ = "persons"
 
     id = mapped_column(Integer, primary_key=True, index=True)
-    sex = mapped_column(Enum(SexType))
+    sex = mapped_column(EnumCode(SexType))
     family_name = mapped_column(String)
     given_name = mapped_column(String)
     birth_date = mapped_column(Date)
@@ -195,55 +166,71 @@ class PersonResult(Base):
     __tablename__ = "person_results"
 
     id = mapped_column(Integer, primary_key=True, index=True)
-    person = mapped_column(Integer, ForeignKey("persons.id"))
-    organisation = mapped_column(Integer, ForeignKey("organisations.id"), nullable=True)
-
-
-class ResultStatus(enum.Enum):
-    OK = 'OK'  # Finished and validated.
-    FINISHED = 'Finished'  # Finished but not yet validated.
-    MISSING_PUNCH = 'MissingPunch'  # Missing punch.
-    DISQUALIFIED = 'Disqualified'  # Disqualified (for some other reason than a missing punch).
-    DID_NOT_FINISH = 'DidNotFinish'  # Did not finish (i.e. conciously cancelling the race after having started,
+    class_result_id = mapped_column("class_result", Integer, ForeignKey("class_results.id"), index=True)
+    person_id = mapped_column("person", Integer, ForeignKey("persons.id"))
+    organisation_id = mapped_column("organisation", Integer, ForeignKey("organisations.id"), nullable=True)
+
+    class_result = relationship("ClassResult", back_populates="person_results")
+    person = relationship("Person")
+    organisation = relationship("Organisation")
+    race_results = relationship("PersonRaceResult", back_populates="person_result", order_by="PersonRaceResult.id")
+
+
+class ResultStatus(IofEnum):
+    OK = 'OK', 1  # Finished and validated.
+    FINISHED = 'Finished', 2  # Finished but not yet validated.
+    MISSING_PUNCH = 'MissingPunch', 3  # Missing punch.
+    DISQUALIFIED = 'Disqualified', 4  # Disqualified (for some other reason than a missing punch).
+    DID_NOT_FINISH = 'DidNotFinish', 5  # Did not finish (i.e. conciously cancelling the race after having started,
     # in contrast to MissingPunch).
-    ACTIVE = 'Active'  # Currently on course.
-    INACTIVE = 'Inactive'  # Has not yet started.
-    OVER_TIME = 'OverTime'  # Overtime, i.e. did not finish within the maximum time set by the organiser.
-    SPORTING_WITHDRAWAL = 'SportingWithdrawal'  # Sporting withdrawal (e.g. helping an injured competitor).
-    NOT_COMPETING = 'NotCompeting'  # Not competing (i.e. running outside the competition).
-    MOVED = 'Moved'  # Moved to another class.
-    MOVED_UP = 'MovedUp'  # Moved to a "better" class, in case of entry restrictions.
-    DID_NOT_START = 'DidNotStart'  # Did not start (in this race).
-    DID_NOT_ENTER = 'DidNotEnter'  # Did not enter (in this race).
-    CANCELLED = 'Cancelled'  # The competitor has cancelled his/hers entry.
+    ACTIVE = 'Active', 6  # Currently on course.
+    INACTIVE = 'Inactive', 7  # Has not yet started.
+    OVER_TIME = 'OverTime', 8  # Overtime, i.e. did not finish within the maximum time set by the organiser.
+    SPORTING_WITHDRAWAL = 'SportingWithdrawal', 9  # Sporting withdrawal (e.g. helping an injured competitor).
+    NOT_COMPETING = 'NotCompeting', 10  # Not competing (i.e. running outside the competition).
+    MOVED = 'Moved', 11  # Moved to another class.
+    MOVED_UP = 'MovedUp', 12  # Moved to a "better" class, in case of entry restrictions.
+    DID_NOT_START = 'DidNotStart', 13  # Did not start (in this race).
+    DID_NOT_ENTER = 'DidNotEnter', 14  # Did not enter (in this race).
+    CANCELLED = 'Cancelled', 15  # The competitor has cancelled his/hers entry.
 
 
 class PersonRaceResult(Base):
     __tablename__ = "person_race_results"
 
     id = mapped_column(Integer, primary_key=True, index=True)
+    person_result_id = mapped_column("person_result", Integer, ForeignKey("person_results.id"), index=True)
+    race_number = mapped_column(Integer, default=1)
     bib_number = mapped_column(String, nullable=True)
     start_time = mapped_column(DateTime, nullable=True)
     finish_time = mapped_column(DateTime, nullable=True)
-    time = mapped_column(Double, nullable=True)
-    time_behind = mapped_column(Double, nullable=True)
-    position = mapped_column(Integer, nullable=True)
-    status = mapped_column(Enum(ResultStatus))
+    time = mapped_column(Milliseconds, nullable=True)
+    # position and time_behind are recomputed per class by the importer (see crud.rank_class_result)
+    time_behind = mapped_column(Milliseconds, nullable=True)
+    position = mapped_column(Integer, nullable=True, index=True)
+    status = mapped_column(EnumCode(ResultStatus))
     control_card = mapped_column(String, nullable=True)
+    # split times in one value (see packed_splits); NULL if they are rows of split_times
+    packed_splits = mapped_column(LargeBinary, nullable=True)
 
+    person_result = relationship("PersonResult", back_populates="race_results")
+    split_times = relationship("SplitTime", back_populates="result", order_by="SplitTime.id")
 
-class SplitTimeStatusType(enum.Enum):
-    OK = 'OK'  # Control belongs to the course and has been punched (either by electronical punching or pin
+
+class SplitTimeStatusType(IofEnum):
+    OK = 'OK', 1  # Control belongs to the course and has been punched (either by electronical punching or pin
     # punching). If the time is not available or invalid, omit the Time element.
-    MISSING = 'Missing'  # Control belongs to the course but has not been punched.
-    ADDITIONAL = 'Additional'  # Control does not belong to the course, but the competitor has punched it.
+    MISSING = 'Missing', 2  # Control belongs to the course but has not been punched.
+    ADDITIONAL = 'Additional', 3  # Control does not belong to the course, but the competitor has punched it.
 
 
 class SplitTime(Base):
     __tablename__ = "split_times"
 
     id = mapped_column(Integer, primary_key=True, index=True)
-    result = mapped_column(Integer, ForeignKey("person_race_results.id"))
-    status = mapped_column(Enum(SplitTimeStatusType), default=SplitTimeStatusType.OK)
+    result_id = mapped_column("result", Integer, ForeignKey("person_race_results.id"), index=True)
+    status = mapped_column(EnumCode(SplitTimeStatusType), default=SplitTimeStatusType.OK)
     control_code = mapped_column(String)
-    time = mapped_column(Double, nullable=True)
+    time = mapped_column(Milliseconds, nullable=True)
+
+    result = relationship("PersonRaceResult", back_populates="split_times")
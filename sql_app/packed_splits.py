@@ -0,0 +1,95 @@
+"""Split times of a race result packed into one binary value, an alternative to one split_times row per punch.
+
+With EVENT_PRESENTER_SPLIT_STORAGE=packed the importer writes the split times of every race result into its
+packed_splits column instead of split_times; a race result without packed splits (NULL) keeps its split times in
+split_times, so readers handle databases with either layout, or both. The value is little-endian:
+
+    number of split times   uint32
+    layout version          uint8, VERSION, then 3 bytes of padding
+    times                   int32 milliseconds per split time (see durations), MISSING where there is no time
+    statuses                uint8 per split time, the codes of SplitTimeStatusType (see enum_codec)
+    control codes           UTF-8, separated by NUL; a missing control code is stored as an empty one
+
+The arrays are decoded without copying, as memoryviews or as NumPy arrays over the value.
+"""
+import os
+import struct
+import sys
+from array import array
+from typing import NamedTuple, Optional, Sequence
+
+from . import enum_codec
+from .durations import to_milliseconds, to_seconds
+from .models import SplitTimeStatusType
+
+SPLIT_STORAGES = ("rows", "packed")
+# Layout the importer writes new split times in
+SPLIT_STORAGE = os.environ.get("EVENT_PRESENTER_SPLIT_STORAGE", "rows")
+if SPLIT_STORAGE not in SPLIT_STORAGES:
+    raise ValueError(f"EVENT_PRESENTER_SPLIT_STORAGE must be one of {', '.join(SPLIT_STORAGES)}")
+
+HEADER = struct.Struct("<IB3x")
+# 1 since times are milliseconds; the float64 seconds of revision 0005 have 0, which lets 0006 convert each value once
+VERSION = 1
+MISSING = -2 ** 31
+SEPARATOR = "\0"
+_LITTLE_ENDIAN = sys.byteorder == "little"
+_STATUS_CODES = enum_codec.codes(SplitTimeStatusType)
+
+
+class PackedSplits(NamedTuple):
+    control_codes: list[str]
+    statuses: Sequence[int]
+    times: Sequence[int]
+
+
+def pack(split_times) -> bytes:
+    """Pack split times, objects with control_code, status and time like schemas.SplitTimeCreate."""
+    times = array("i", [MISSING if split_time.time is None else to_milliseconds(split_time.time)
+                        for split_time in split_times])
+    if not _LITTLE_ENDIAN:
+        times.byteswap()
+    statuses = bytes(_STATUS_CODES[split_time.status or SplitTimeStatusType.OK] for split_time in split_times)
+    control_codes = SEPARATOR.join(split_time.control_code or "" for split_time in split_times)
+    return b"".join((HEADER.pack(len(statuses), VERSION), times.tobytes(), statuses, control_codes.encode()))
+
+
+def _sections(packed: bytes) -> tuple[int, int, int]:
+    """Number of split times and the offsets of the statuses and the control codes."""
+    count, _ = HEADER.unpack_from(packed)
+    statuses = HEADER.size + 4 * count
+    return count, statuses, statuses + count
+
+
+def _control_codes(packed: bytes, count: int, offset: int) -> list[str]:
+    return bytes(packed[offset:]).decode().split(SEPARATOR) if count else []
+
+
+def unpack(packed: bytes) -> PackedSplits:
+    """The split times as memoryviews over `packed`, plus the list of control codes."""
+    count, statuses, control_codes = _sections(packed)
+    view = memoryview(packed)
+    if _LITTLE_ENDIAN:
+        times = view[HEADER.size:statuses].cast("i")
+    else:
+        times = array("i", view[HEADER.size:statuses])
+        times.byteswap()
+    return PackedSplits(_control_codes(view, count, control_codes), view[statuses:control_codes], times)
+
+
+def unpack_arrays(packed: bytes):
+    """The split times as NumPy arrays over `packed` (statuses as uint8 codes), plus the control codes."""
+    import numpy as np
+
+    count, statuses, control_codes = _sections(packed)
+    return PackedSplits(_control_codes(packed, count, control_codes),
+                        np.frombuffer(packed, np.uint8, count, statuses),
+                        np.frombuffer(packed, "<i4", count, HEADER.size))
+
+
+def split_times(packed: bytes) -> list[tuple[str, SplitTimeStatusType, Optional[float]]]:
+    """(control_code, status, time in seconds) of every split time; time is None where there is none."""
+    members = enum_codec.members(SplitTimeStatusType)
+    control_codes, statuses, times = unpack(packed)
+    return [(control_code, members[status], None if time == MISSING else to_seconds(time))
+            for control_code, status, time in zip(control_codes, statuses, times)]
@@ -0,0 +1,84 @@
+"""Paged standings for the rotating screens at the arena."""
+import hashlib
+from typing import Optional
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import ClassResult, EventClass, PersonResult, PersonRaceResult, Person, Organisation
+from .versions import VersionRegistry
+
+STANDING_FIELDS = ("position", "family_name", "given_name", "organisation", "time", "time_behind", "status")
+
+
+class Scoreboard:
+    """Standings of all classes of an event, kept in memory between imports.
+
+    Every class is loaded once per version: a request after an import reloads only the classes whose version
+    changed, with a single query, and slices all classes into pages from memory. The classes of older result lists
+    of an event are dropped once a newer one is loaded.
+    """
+
+    def __init__(self, registry: VersionRegistry):
+        self.registry = registry
+        # (result list id, event class id, race number) -> (version, class header, standing rows)
+        self._classes: dict[tuple[int, int, int], tuple[int, dict, list[dict]]] = {}
+
+    async def etag(self, event_id: int, rows: int, race_number: int = 1) -> Optional[str]:
+        result_list_id = await self.registry.latest_result_list(event_id)
+        if result_list_id is None:
+            return None
+        versions = await self.registry.classes_of_result_list(result_list_id)
+        tag = hashlib.blake2b(repr(sorted(versions.items())).encode(), digest_size=8).hexdigest()
+        return f'"presenter-{event_id}-{result_list_id}-{tag}-{rows}-{race_number}"'
+
+    async def pages(self, db: AsyncSession, event_id: int, rows: int, race_number: int = 1) -> Optional[list[dict]]:
+        result_list_id = await self.registry.latest_result_list(event_id)
+        if result_list_id is None:
+            return None
+        versions = await self.registry.classes_of_result_list(result_list_id)
+        changed = [event_class_id for event_class_id, version in versions.items()
+                   if self._classes.get((result_list_id, event_class_id, race_number), (None,))[0] != version]
+        if changed:
+            self._evict(event_id, result_list_id)
+            await self._load(db, result_list_id, changed, versions, race_number)
+
+        pages = []
+        for event_class_id in sorted(versions):
+            _, header, standings = self._classes[(result_list_id, event_class_id, race_number)]
+            number_of_pages = -(-len(standings) // rows)
+            for page in range(number_of_pages):
+                pages.append({**header, "page": page + 1, "pages": number_of_pages, "runners": len(standings),
+                              "rows": standings[page * rows:(page + 1) * rows]})
+        return pages
+
+    def _evict(self, event_id: int, result_list_id: int) -> None:
+        """Drop the classes of the result lists of an event other than result_list_id, and of removed result lists."""
+        for key in [key for key in self._classes if key[0] != result_list_id and
+                    self.registry.event_of_result_list(key[0]) in (event_id, None)]:
+            del self._classes[key]
+
+    async def _load(self, db: AsyncSession, result_list_id: int, event_class_ids: list[int],
+                    versions: dict[int, int], race_number: int):
+        headers = {event_class_id: {"result_list_id": result_list_id, "event_class_id": event_class_id,
+                                    "class_name": name, "class_short_name": short_name}
+                   for event_class_id, name, short_name in await db.execute(
+                       select(EventClass.id, EventClass.name, EventClass.short_name)
+                       .where(EventClass.id.in_(event_class_ids)))}
+        standings = {event_class_id: [] for event_class_id in event_class_ids}
+        for event_class_id, *standing in await db.execute(
+                select(ClassResult.event_class_id, PersonRaceResult.position, Person.family_name, Person.given_name,
+                       func.coalesce(Organisation.short_name, Organisation.name), PersonRaceResult.time,
+                       PersonRaceResult.time_behind, PersonRaceResult.status)
+                .join(PersonResult, PersonResult.class_result_id == ClassResult.id)
+                .join(PersonRaceResult, PersonRaceResult.person_result_id == PersonResult.id)
+                .outerjoin(Person, PersonResult.person_id == Person.id)
+                .outerjoin(Organisation, PersonResult.organisation_id == Organisation.id)
+                .where(ClassResult.result_list_id == result_list_id, ClassResult.event_class_id.in_(event_class_ids),
+                       PersonRaceResult.race_number == race_number)
+                .order_by(ClassResult.event_class_id, PersonRaceResult.position.is_(None), PersonRaceResult.position,
+                          PersonResult.id)):
+            standings[event_class_id].append(dict(zip(STANDING_FIELDS, standing)))
+        for event_class_id in event_class_ids:
+            self._classes[(result_list_id, event_class_id, race_number)] = (
+                versions[event_class_id], headers.get(event_class_id, {}), standings[event_class_id])
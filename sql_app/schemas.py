@@ -1,8 +1,10 @@
 import datetime
+from typing import Optional
 
 from pydantic import BaseModel
 
-from sql_app.models import ResultListStatusType, ResultListModeType, EventClassStatus, SexType
+from sql_app.models import ResultListStatusType, ResultListModeType, EventClassStatus, SexType, ResultStatus, \
+    SplitTimeStatusType
 
 
 class EventBase(BaseModel):
@@ -45,7 +47,7 @@ class ResultList(ResultListBase):
 class EventClassBase(BaseModel):
     name: str
     short_name: str = None
-    sex: SexType
+    sex: SexType = None
     result_list_mode: ResultListModeType = ResultListModeType.DEFAULT
     status: EventClassStatus = EventClassStatus.NORMAL
     min_number_of_team_members: int = 1
@@ -57,6 +59,13 @@ class EventClassCreate(EventClassBase):
     pass
 
 
+class EventClass(EventClassBase):
+    id: int
+
+    class Config:
+        orm_mode = True
+
+
 class CourseBase(BaseModel):
     result_list: int
     event_class: int
@@ -71,3 +80,193 @@ class CourseBase(BaseModel):
 
 class CourseCreate(CourseBase):
     pass
+
+
+class OrganisationBase(BaseModel):
+    name: str
+    short_name: str = None
+
+
+class OrganisationCreate(OrganisationBase):
+    pass
+
+
+class Organisation(OrganisationBase):
+    id: int
+
+    class Config:
+        orm_mode = True
+
+
+class PersonBase(BaseModel):
+    sex: SexType = None
+    family_name: str = None
+    given_name: str = None
+    birth_date: datetime.date = None
+
+
+class PersonCreate(PersonBase):
+    pass
+
+
+class Person(PersonBase):
+    id: int
+
+    class Config:
+        orm_mode = True
+
+
+class SplitTimeBase(BaseModel):
+    control_code: str = None
+    status: SplitTimeStatusType = SplitTimeStatusType.OK
+    time: float = None
+
+
+class SplitTimeCreate(SplitTimeBase):
+    pass
+
+
+class SplitTime(SplitTimeBase):
+    id: int = None  # packed split times (see packed_splits) have no id
+
+    class Config:
+        orm_mode = True
+
+
+class PersonRaceResultBase(BaseModel):
+    race_number: int = 1
+    bib_number: str = None
+    start_time: datetime.datetime = None
+    finish_time: datetime.datetime = None
+    time: float = None
+    time_behind: float = None
+    position: int = None
+    status: ResultStatus
+    control_card: str = None
+
+
+class PersonRaceResultCreate(PersonRaceResultBase):
+    split_times: list[SplitTimeCreate] = []
+
+
+class PersonRaceResult(PersonRaceResultBase):
+    id: int
+    split_times: list[SplitTime] = []
+
+    class Config:
+        orm_mode = True
+
+
+class PersonResultCreate(BaseModel):
+    person: int
+    organisation: int = None
+    race_results: list[PersonRaceResultCreate] = []
+
+
+class PersonResult(BaseModel):
+    id: int
+    person: Person = None
+    organisation: Organisation = None
+    race_results: list[PersonRaceResult] = []
+
+    class Config:
+        orm_mode = True
+
+
+class ClassResultBase(BaseModel):
+    time_resolution: float = 1.0
+
+
+class ClassResultCreate(ClassResultBase):
+    result_list: int
+    event_class: int
+
+
+class ClassResult(ClassResultBase):
+    id: int
+    result_list_id: int
+    event_class: EventClass
+    person_results: list[PersonResult] = []
+
+    class Config:
+        orm_mode = True
+
+
+class Split(BaseModel):
+    time: float = None
+    rank: int = None
+    behind: float = None
+    leg_time: float = None
+    leg_rank: int = None
+    leg_behind: float = None
+
+
+class RunnerSplits(BaseModel):
+    race_result_id: int
+    person_result_id: int
+    family_name: str = None
+    given_name: str = None
+    status: ResultStatus
+    position: int = None
+    splits: list[Split] = []
+
+
+class ClassSplits(BaseModel):
+    result_list_id: int
+    event_class_id: int
+    race_number: int = 1
+    controls: list[str]  # control codes of the split columns, "F" for the finish
+    runners: list[RunnerSplits] = []
+
+
+class LegTimeLoss(BaseModel):
+    leg_time: float = None
+    expected: float = None
+    time_loss: float = None
+
+
+class RunnerTimeLosses(BaseModel):
+    race_result_id: int
+    person_result_id: int
+    family_name: str = None
+    given_name: str = None
+    status: ResultStatus
+    position: int = None
+    performance_index: float = None  # typical leg time relative to the fastest runners, 1.0 is as fast as them
+    total_time_loss: float = None
+    splits: list[LegTimeLoss] = []
+
+
+class ClassTimeLosses(BaseModel):
+    result_list_id: int
+    event_class_id: int
+    race_number: int = 1
+    controls: list[str]  # control codes of the split columns, "F" for the finish
+    reference: list[Optional[float]] = []  # reference leg times
+    runners: list[RunnerTimeLosses] = []
+
+
+class StandingRow(BaseModel):
+    position: int = None
+    family_name: str = None
+    given_name: str = None
+    organisation: str = None
+    time: float = None
+    time_behind: float = None
+    status: ResultStatus
+
+
+class PresenterPage(BaseModel):
+    result_list_id: int
+    event_class_id: int
+    class_name: str = None
+    class_short_name: str = None
+    page: int
+    pages: int
+    runners: int
+    rows: list[StandingRow] = []
+
+
+class SearchResult(BaseModel):
+    persons: list[Person] = []
+    organisations: list[Organisation] = []
@@ -0,0 +1,56 @@
+"""Prefix search over person and organisation names.
+
+On SQLite the search runs against the FTS5 table `search_index` (see the Alembic revision 0003), where the rowid
+encodes the source row: 2 * id for persons, 2 * id + 1 for organisations. Other databases fall back to LIKE
+prefix matches.
+"""
+import re
+
+from sqlalchemy import select, text, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Person, Organisation
+from .serializers import PERSON_FIELDS, ORGANISATION_FIELDS
+
+PERSON_COLUMNS = (Person.sex, Person.family_name, Person.given_name, Person.birth_date, Person.id)
+ORGANISATION_COLUMNS = (Organisation.name, Organisation.short_name, Organisation.id)
+
+
+def tokens(query: str) -> list[str]:
+    return re.findall(r"\w+", query)
+
+
+def fts_query(query: str) -> str:
+    """FTS5 expression matching rows that contain a word starting with every token of the query."""
+    return " ".join(f'"{token}"*' for token in tokens(query))
+
+
+async def search(db: AsyncSession, query: str, limit: int = 20) -> dict:
+    if not tokens(query):
+        return {"persons": [], "organisations": []}
+    if db.get_bind().dialect.name == "sqlite":
+        rowids = (await db.execute(
+            text("SELECT rowid FROM search_index WHERE search_index MATCH :query ORDER BY rank LIMIT :limit"),
+            {"query": fts_query(query), "limit": limit})).scalars().all()
+        person_ids = [rowid // 2 for rowid in rowids if rowid % 2 == 0]
+        organisation_ids = [rowid // 2 for rowid in rowids if rowid % 2 == 1]
+        persons = (await db.execute(select(*PERSON_COLUMNS).where(Person.id.in_(person_ids)))).all() \
+            if person_ids else []
+        organisations = (await db.execute(select(*ORGANISATION_COLUMNS)
+                                          .where(Organisation.id.in_(organisation_ids)))).all() \
+            if organisation_ids else []
+        # keep the FTS ranking
+        ranking = {rowid: index for index, rowid in enumerate(rowids)}
+        persons.sort(key=lambda row: ranking[2 * row.id])
+        organisations.sort(key=lambda row: ranking[2 * row.id + 1])
+    else:
+        persons = (await db.execute(
+            select(*PERSON_COLUMNS).where(and_(*(
+                or_(Person.family_name.ilike(f"{token}%"), Person.given_name.ilike(f"{token}%"))
+                for token in tokens(query)))).limit(limit))).all()
+        organisations = (await db.execute(
+            select(*ORGANISATION_COLUMNS).where(and_(*(
+                or_(Organisation.name.ilike(f"{token}%"), Organisation.short_name.ilike(f"{token}%"))
+                for token in tokens(query)))).limit(limit))).all()
+    return {"persons": [dict(zip(PERSON_FIELDS, row)) for row in persons],
+            "organisations": [dict(zip(ORGANISATION_FIELDS, row)) for row in organisations]}
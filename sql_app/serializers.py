@@ -0,0 +1,198 @@
+"""JSON serialization straight from SQL row tuples.
+
+The functions here produce the same documents as the pydantic schemas in `schemas` but skip building ORM objects
+and validating them one by one, which dominates the latency of large lists. Field names and order follow the
+schemas, so the OpenAPI description of the endpoints stays valid.
+"""
+import asyncio
+import datetime
+import enum
+import json
+from collections import OrderedDict
+from typing import Optional, Callable, Awaitable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import compression, packed_splits
+from .models import Event, ResultList, EventClass, ClassResult, PersonResult, PersonRaceResult, Person, \
+    Organisation, SplitTime
+
+
+def _default(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+_encoder = json.JSONEncoder(default=_default, separators=(",", ":"), ensure_ascii=False)
+
+
+def dumps(document) -> bytes:
+    return _encoder.encode(document).encode()
+
+
+EVENT_COLUMNS = (Event.name, Event.status, Event.classification, Event.form, Event.organisation, Event.id)
+EVENT_FIELDS = ("name", "status", "classification", "form", "organisation", "id")
+
+
+async def events_json(db: AsyncSession, skip: int = 0, limit: int = 100) -> bytes:
+    rows = await db.execute(select(*EVENT_COLUMNS).order_by(Event.id).offset(skip).limit(limit))
+    return dumps([dict(zip(EVENT_FIELDS, row)) for row in rows])
+
+
+async def result_lists_json(db: AsyncSession, skip: int = 0, limit: int = 100) -> bytes:
+    rows = await db.execute(
+        select(ResultList.status, ResultList.create_time, ResultList.creator, ResultList.id, *EVENT_COLUMNS)
+        .join(Event, ResultList.event_id == Event.id).order_by(ResultList.id).offset(skip).limit(limit))
+    return dumps([{"status": status, "create_time": create_time, "creator": creator,
+                   "event": dict(zip(EVENT_FIELDS, event)), "id": result_list_id}
+                  for status, create_time, creator, result_list_id, *event in rows])
+
+
+EVENT_CLASS_COLUMNS = (EventClass.name, EventClass.short_name, EventClass.sex, EventClass.result_list_mode,
+                       EventClass.status, EventClass.min_number_of_team_members,
+                       EventClass.max_number_of_team_members, EventClass.result_list, EventClass.id)
+EVENT_CLASS_FIELDS = ("name", "short_name", "sex", "result_list_mode", "status", "min_number_of_team_members",
+                      "max_number_of_team_members", "result_list", "id")
+PERSON_FIELDS = ("sex", "family_name", "given_name", "birth_date", "id")
+ORGANISATION_FIELDS = ("name", "short_name", "id")
+RACE_RESULT_FIELDS = ("race_number", "bib_number", "start_time", "finish_time", "time", "time_behind", "position",
+                      "status", "control_card", "id")
+SPLIT_TIME_FIELDS = ("control_code", "status", "time", "id")
+
+
+async def class_result_json(db: AsyncSession, result_list_id: int, event_class_id: int) -> Optional[bytes]:
+    """Serialize a full class standing with at most three queries, whatever the size of the class.
+
+    Standings come straight from the positions materialized by crud.rank_class_result, per race, with unranked
+    runners last.
+    """
+    row = (await db.execute(
+        select(ClassResult.time_resolution, ClassResult.id, ClassResult.result_list_id, *EVENT_CLASS_COLUMNS)
+        .join(EventClass, ClassResult.event_class_id == EventClass.id)
+        .where(ClassResult.result_list_id == result_list_id, ClassResult.event_class_id == event_class_id)
+    )).first()
+    if row is None:
+        return None
+    time_resolution, class_result_id, class_result_list_id, *event_class = row
+
+    # split times of the race results without packed splits, filled from split_times rows at the end
+    split_times: dict[int, list] = {}
+    person_results = []
+    by_id = {}
+    for row in await db.execute(
+            select(PersonResult.id,
+                   Person.sex, Person.family_name, Person.given_name, Person.birth_date, Person.id,
+                   Organisation.name, Organisation.short_name, Organisation.id,
+                   PersonRaceResult.race_number, PersonRaceResult.bib_number, PersonRaceResult.start_time,
+                   PersonRaceResult.finish_time, PersonRaceResult.time, PersonRaceResult.time_behind,
+                   PersonRaceResult.position, PersonRaceResult.status, PersonRaceResult.control_card,
+                   PersonRaceResult.id, PersonRaceResult.packed_splits)
+            .outerjoin(Person, PersonResult.person_id == Person.id)
+            .outerjoin(Organisation, PersonResult.organisation_id == Organisation.id)
+            .outerjoin(PersonRaceResult, PersonRaceResult.person_result_id == PersonResult.id)
+            .where(PersonResult.class_result_id == class_result_id)
+            .order_by(PersonRaceResult.race_number, PersonRaceResult.position.is_(None),
+                      PersonRaceResult.position, PersonResult.id)):
+        person_result_id = row[0]
+        person_result = by_id.get(person_result_id)
+        if person_result is None:
+            person_result = by_id[person_result_id] = {
+                "id": person_result_id,
+                "person": dict(zip(PERSON_FIELDS, row[1:6])) if row[5] is not None else None,
+                "organisation": dict(zip(ORGANISATION_FIELDS, row[6:9])) if row[8] is not None else None,
+                "race_results": []}
+            person_results.append(person_result)
+        if row[18] is not None:
+            race = dict(zip(RACE_RESULT_FIELDS, row[9:19]))
+            if row[19] is None:
+                race["split_times"] = split_times[row[18]] = []
+            else:
+                race["split_times"] = [dict(zip(SPLIT_TIME_FIELDS, (*split_time, None)))
+                                       for split_time in packed_splits.split_times(row[19])]
+            person_result["race_results"].append(race)
+
+    if split_times:
+        for result_id, *split_time in await db.execute(
+                select(SplitTime.result_id, SplitTime.control_code, SplitTime.status, SplitTime.time, SplitTime.id)
+                .join(PersonRaceResult, SplitTime.result_id == PersonRaceResult.id)
+                .join(PersonResult, PersonRaceResult.person_result_id == PersonResult.id)
+                .where(PersonResult.class_result_id == class_result_id, PersonRaceResult.packed_splits.is_(None))
+                .order_by(SplitTime.result_id, SplitTime.id)):
+            split_times[result_id].append(dict(zip(SPLIT_TIME_FIELDS, split_time)))
+
+    return dumps({"time_resolution": time_resolution, "id": class_result_id, "result_list_id": class_result_list_id,
+                  "event_class": dict(zip(EVENT_CLASS_FIELDS, event_class)), "person_results": person_results})
+
+
+# result of a single flight whose caller failed or was cancelled
+_FAILED = object()
+
+
+class ResponseCache:
+    """Small LRU cache of serialized response bodies.
+
+    Keys must identify the version of the data, e.g. the entity tag of the response, so entries never have to be
+    invalidated: a new import produces a new key and the old body simply ages out. Compressed copies of a body are
+    made on first request per content encoding and age out together with the body. Concurrent requests for a body or
+    a compressed copy that is not cached yet wait for the one request that builds it.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        # key -> {content encoding (None for identity) -> body}
+        self._entries: OrderedDict[str, dict[Optional[str], bytes]] = OrderedDict()
+        # (key, content encoding) -> result of the build or compression in flight
+        self._pending: dict[tuple[str, Optional[str]], asyncio.Future] = {}
+
+    async def _single_flight(self, key: tuple[str, Optional[str]], make: Callable[[], Awaitable]):
+        """Result of make(), shared with every call for the same key while it runs.
+
+        If make() fails or the caller running it is cancelled, the waiting callers start over.
+        """
+        while (pending := self._pending.get(key)) is not None:
+            result = await asyncio.shield(pending)
+            if result is not _FAILED:
+                return result
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        result = _FAILED
+        try:
+            result = await make()
+            return result
+        finally:
+            del self._pending[key]
+            future.set_result(result)
+
+    async def get_or_build(self, key: str, build: Callable[[], Awaitable[Optional[bytes]]]) -> Optional[bytes]:
+        bodies = self._entries.get(key)
+        if bodies is not None:
+            self._entries.move_to_end(key)
+            return bodies[None]
+        return await self._single_flight((key, None), lambda: self._build(key, build))
+
+    async def _build(self, key: str, build: Callable[[], Awaitable[Optional[bytes]]]) -> Optional[bytes]:
+        body = await build()
+        if body is None:
+            return None
+        self._entries[key] = {None: body}
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return body
+
+    async def encoded(self, key: str, body: bytes, encoding: str) -> bytes:
+        """`body`, the cached body of `key`, compressed with `encoding`."""
+        # if the body aged out in the meantime, its compressed copy is not kept either
+        bodies = self._entries.get(key, {})
+        if encoding in bodies:
+            return bodies[encoding]
+        return await self._single_flight((key, encoding), lambda: self._compress(bodies, body, encoding))
+
+    @staticmethod
+    async def _compress(bodies: dict[Optional[str], bytes], body: bytes, encoding: str) -> bytes:
+        # off the event loop: high compression levels take a while on large standings
+        bodies[encoding] = await asyncio.to_thread(compression.compress, body, encoding)
+        return bodies[encoding]
@@ -0,0 +1,112 @@
+import asyncio
+import hashlib
+import time
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .models import ResultList, ClassResult
+
+# Clients may reuse a cached response, but have to revalidate it with If-None-Match on every poll.
+CACHE_CONTROL = "public, no-cache"
+
+
+class VersionRegistry:
+    """In-process snapshot of the version counters the importer bumps.
+
+    The importer runs in its own process, so the snapshot is reloaded from the database with two plain Core
+    queries, at most once every ``max_age`` seconds and regardless of the number of requests. Looking up a
+    version in between is a dictionary access, which keeps conditional requests away from the ORM.
+    """
+
+    def __init__(self, engine: AsyncEngine, max_age: float = 1.0):
+        self.engine = engine
+        self.max_age = max_age
+        self._lock = asyncio.Lock()
+        self._loaded_at: Optional[float] = None
+        self._result_lists: dict[int, int] = {}
+        self._result_list_events: dict[int, int] = {}
+        self._class_results: dict[tuple[int, int], int] = {}
+        self._latest_result_lists: dict[int, int] = {}
+        self._classes_of_result_lists: dict[int, dict[int, int]] = {}
+        self._result_lists_tag = ""
+
+    def expire(self) -> None:
+        """Make the next lookup reload the snapshot."""
+        self._loaded_at = None
+
+    async def refresh(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and self._loaded_at is not None and now - self._loaded_at < self.max_age:
+            return
+        async with self._lock:
+            if not force and self._loaded_at is not None and now - self._loaded_at < self.max_age:
+                return
+            async with self.engine.connect() as connection:
+                rows = (await connection.execute(
+                    select(ResultList.id, ResultList.event_id, ResultList.version))).all()
+                class_results = {(result_list_id, event_class_id): version
+                                 for result_list_id, event_class_id, version in (await connection.execute(
+                                     select(ClassResult.result_list_id, ClassResult.event_class_id,
+                                            ClassResult.version))).all()}
+            result_lists = {result_list_id: version for result_list_id, _, version in rows}
+            self._result_lists = result_lists
+            self._result_list_events = {result_list_id: event_id for result_list_id, event_id, _ in rows}
+            self._class_results = class_results
+            latest_result_lists = {}
+            for result_list_id, event_id, _ in rows:
+                latest_result_lists[event_id] = max(result_list_id, latest_result_lists.get(event_id, 0))
+            self._latest_result_lists = latest_result_lists
+            classes_of_result_lists = {}
+            for (result_list_id, event_class_id), version in class_results.items():
+                classes_of_result_lists.setdefault(result_list_id, {})[event_class_id] = version
+            self._classes_of_result_lists = classes_of_result_lists
+            self._result_lists_tag = hashlib.blake2b(repr(sorted(result_lists.items())).encode(),
+                                                     digest_size=8).hexdigest()
+            self._loaded_at = time.monotonic()
+
+    def class_results(self) -> dict[tuple[int, int], int]:
+        """Versions of all class results, keyed by (result list id, event class id), as of the last refresh."""
+        return self._class_results
+
+    def event_of_result_list(self, result_list_id: int) -> Optional[int]:
+        return self._result_list_events.get(result_list_id)
+
+    async def latest_result_list(self, event_id: int) -> Optional[int]:
+        """The most recently imported result list of an event."""
+        await self.refresh()
+        return self._latest_result_lists.get(event_id)
+
+    async def classes_of_result_list(self, result_list_id: int) -> dict[int, int]:
+        """Versions of the class results of a result list, keyed by event class id."""
+        await self.refresh()
+        return self._classes_of_result_lists.get(result_list_id, {})
+
+    async def result_list_version(self, result_list_id: int) -> Optional[int]:
+        await self.refresh()
+        return self._result_lists.get(result_list_id)
+
+    async def class_result_version(self, result_list_id: int, event_class_id: int) -> Optional[int]:
+        await self.refresh()
+        return self._class_results.get((result_list_id, event_class_id))
+
+    async def result_lists_etag(self, skip: int, limit: int) -> str:
+        await self.refresh()
+        return f'"result-lists-{self._result_lists_tag}-{skip}-{limit}"'
+
+    async def class_result_etag(self, result_list_id: int, event_class_id: int, variant: str = "") -> Optional[str]:
+        """Entity tag of a class result; `variant` distinguishes different documents derived from it."""
+        version = await self.class_result_version(result_list_id, event_class_id)
+        if version is None:
+            return None
+        return f'"class-result-{result_list_id}-{event_class_id}-{version}{variant}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """Weak comparison of an If-None-Match header against an entity tag, as RFC 9110 requires for GET."""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))